@@ -0,0 +1,53 @@
+# Benchmark: pyplot vs template-figure history chart rendering
+# Run from 5th_Draft/:  python -m benchmarks.bench_chart_render
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib  # noqa: E402
+
+matplotlib.use("Agg")
+
+from src.chart_render import render_png, render_png_pyplot  # noqa: E402
+
+
+def sample(days: int, seed: int):
+    rng = np.random.default_rng(seed)
+    dates = np.arange(np.datetime64("2025-01-02"), np.datetime64("2025-01-02") + days).astype("datetime64[ns]")
+    closes = 100 * np.cumprod(1 + rng.normal(0, 0.01, days))
+    return dates, closes
+
+
+def renders_per_second(fn, repeat: int, threads: int = 1) -> float:
+    inputs = [sample(5 + i % 30, i) for i in range(repeat)]
+    fn("WARM", *inputs[0])
+
+    def work(part):
+        for i in part:
+            fn("BENCH", *inputs[i])
+
+    chunks = [range(t, repeat, threads) for t in range(threads)]
+    start = time.perf_counter()
+    workers = [threading.Thread(target=work, args=(c,)) for c in chunks]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return repeat / (time.perf_counter() - start)
+
+
+def main(repeat: int = 100) -> None:
+    pyplot_rate = renders_per_second(render_png_pyplot, repeat)
+    fast_rate = renders_per_second(render_png, repeat)
+    print(f"pyplot:          {pyplot_rate:6.1f} renders/s ({1000 / pyplot_rate:.1f} ms each)")
+    print(f"template figure: {fast_rate:6.1f} renders/s ({1000 / fast_rate:.1f} ms each) | {fast_rate / pyplot_rate:.1f}x")
+    print(f"template figure, 4 threads: {renders_per_second(render_png, repeat, threads=4):6.1f} renders/s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100)
@@ -0,0 +1,42 @@
+# Benchmark: full-tree vs fast headline extraction on saved Google News pages
+# Run from 5th_Draft/:  python -m benchmarks.bench_headlines
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_fetcher import FAST_HTML_PARSER, extract_headlines_fast, extract_headlines_full  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def bench(fn, html: str, repeat: int) -> float:
+    """Return milliseconds per call."""
+    fn(html)  # warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(html)
+    return (time.perf_counter() - start) / repeat * 1000.0
+
+
+def main(repeat: int = 20) -> None:
+    print(f"fast path parser: {FAST_HTML_PARSER}")
+    for name in sorted(os.listdir(FIXTURES)):
+        if not name.endswith(".html"):
+            continue
+        with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+            html = f.read()
+        full = extract_headlines_full(html)
+        fast = extract_headlines_fast(html)
+        assert fast == full, f"{name}: fast path disagrees with full parse"
+        full_ms = bench(extract_headlines_full, html, repeat)
+        fast_ms = bench(extract_headlines_fast, html, repeat)
+        print(
+            f"{name}: {len(html) // 1024} KB, {len(full)} headlines | "
+            f"full {full_ms:.1f} ms | fast {fast_ms:.1f} ms | {full_ms / fast_ms:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
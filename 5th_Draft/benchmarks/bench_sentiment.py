@@ -0,0 +1,63 @@
+# Benchmark: per-headline VADER scoring vs memoized batch scoring
+# Run from 5th_Draft/:  python -m benchmarks.bench_sentiment
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import sentiment_analyzer  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+# Headlines generated from templates, and a smaller set written by hand
+CORPORA = {"templated": "headlines.tsv", "hand-written": "headlines_handwritten.tsv"}
+
+
+def load_headlines(corpus=None):
+    """(label, headline) rows of one labeled corpus, or of all of them."""
+    rows = []
+    for name in [corpus] if corpus else CORPORA:
+        with open(os.path.join(FIXTURES, CORPORA[name]), encoding="utf-8") as f:
+            next(f)
+            rows.extend(tuple(line.rstrip("\n").split("\t", 1)) for line in f if line.strip())
+    return rows
+
+
+def per_second(fn, headlines, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(headlines)
+    return repeat * len(headlines) / (time.perf_counter() - start)
+
+
+def main(repeat: int = 20) -> None:
+    headlines = [h for _, h in load_headlines()]
+    sia = sentiment_analyzer.analyzer()
+    if sia is None:
+        sys.exit("VADER lexicon not found: set VADER_LEXICON_PATH or NLTK_DATA")
+    raw = per_second(lambda hs: [sia.polarity_scores(h) for h in hs], headlines, repeat)
+
+    def cold(hs):
+        sentiment_analyzer.memo.clear()
+        sentiment_analyzer.analyze_sentiment_batch(hs)
+
+    cold_rate = per_second(cold, headlines, repeat)
+    sentiment_analyzer.analyze_sentiment_batch(headlines)
+    # A cached news list is re-scored on every news request: 5 headlines at a time
+    requests = [headlines[i:i + 5] for i in range(0, len(headlines), 5)]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for batch in requests:
+            sentiment_analyzer.analyze_sentiment_batch(batch)
+    warm_rate = repeat * len(headlines) / (time.perf_counter() - start)
+
+    print(f"{len(headlines)} headlines")
+    print(f"polarity_scores per headline: {raw:9.0f} headlines/s")
+    print(f"batch, empty memo:            {cold_rate:9.0f} headlines/s")
+    print(f"batch, warm memo:             {warm_rate:9.0f} headlines/s | {warm_rate / raw:.0f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
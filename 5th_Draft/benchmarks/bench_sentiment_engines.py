@@ -0,0 +1,50 @@
+# Benchmark: accuracy and throughput of the sentiment engines on labeled headlines
+# Run from 5th_Draft/:  python -m benchmarks.bench_sentiment_engines
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.sentiment_analyzer import batch_scorer  # noqa: E402
+from benchmarks.bench_sentiment import CORPORA, load_headlines  # noqa: E402
+
+ENGINES = ("vader", "finance", "sklearn")
+
+
+def accuracy(score_batch, rows) -> float:
+    predicted = score_batch([headline for _, headline in rows])
+    return sum(p == label for (p, _), (label, _) in zip(predicted, rows)) / len(rows)
+
+
+def throughput(score_batch, headlines, repeat: int, batch_size: int) -> float:
+    """Headlines per second of one engine, without the memo."""
+    batches = [headlines[i:i + batch_size] for i in range(0, len(headlines), batch_size)]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for batch in batches:
+            score_batch(batch)
+    return repeat * len(headlines) / (time.perf_counter() - start)
+
+
+def main(repeat: int = 20) -> None:
+    corpora = {name: load_headlines(name) for name in CORPORA}
+    headlines = [headline for rows in corpora.values() for _, headline in rows]
+    print(", ".join(f"{len(rows)} {name}" for name, rows in corpora.items()) + " labeled headlines")
+    # The templated headlines share the finance lexicon's and the model's training
+    # vocabulary; the hand-written ones are the fairer accuracy figure
+    for engine in ENGINES:
+        score_batch = batch_scorer(engine)
+        if score_batch is None:
+            print(f"{engine:8s} unavailable")
+            continue
+        for name, rows in corpora.items():
+            print(f"{engine:8s} accuracy {name:12s} {accuracy(score_batch, rows):6.1%}")
+        # 5 headlines is one news reply; the whole corpus is a bulk scoring job
+        for batch_size in (5, len(headlines)):
+            rate = throughput(score_batch, headlines, repeat, batch_size)
+            print(f"{engine:8s} batch {batch_size:4d} | {rate:9.0f} headlines/s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
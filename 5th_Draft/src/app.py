@@ -1,10 +1,23 @@
 # app.py
-from flask import Flask, render_template, request, jsonify, session
-from .chatbot import chatbot_response
+from flask import Flask, Response, render_template, request, jsonify, session
+from .chatbot import chatbot_response, prewarm_popular_news
 from . import config
+import json
 import logging
+import os
+import queue
+import re
+import threading
+import time
 from .storage import init_db, log_chat
 from .ai_client import generate_ai_reply
+from .data_fetcher import cache, get_price_details_many, render_pool
+from .charts import chart_cache, chart_png, history_series_payload
+from .chart_render import RenderBusy
+from .symbols import is_listed
+from . import sentiment_analyzer
+from .quote_stream import FakeQuoteSource, QuoteHub
+from . import resilience
 
 
 # Initialize Flask app
@@ -24,6 +37,50 @@ app.logger.setLevel(getattr(logging, config.LOG_LEVEL, logging.INFO))
 
 init_db()
 
+if config.SENTIMENT_PRELOAD:
+    sentiment_analyzer.preload()
+
+quote_hub = QuoteHub(
+    FakeQuoteSource() if config.QUOTE_STREAM_SOURCE == "fake" else get_price_details_many,
+    interval_seconds=config.QUOTE_STREAM_INTERVAL_SECS,
+)
+
+# Each open stream holds a web worker thread; past this many per worker new streams get a 503
+stream_slots = threading.BoundedSemaphore(config.QUOTE_STREAM_MAX_CLIENTS)
+
+_background_pid = None
+_background_lock = threading.Lock()
+
+
+def _news_prewarm_loop():
+    while True:
+        try:
+            warmed = prewarm_popular_news()
+            if warmed:
+                app.logger.debug("Pre-warmed news for %s", ", ".join(warmed))
+        except Exception as e:
+            app.logger.warning(f"News pre-warm failed: {str(e)}")
+        time.sleep(config.NEWS_PREWARM_INTERVAL_SECS)
+
+
+@app.before_request
+def start_background_jobs():
+    """Start per-worker background threads on the first request (after any fork)."""
+    global _background_pid
+    if _background_pid == os.getpid():
+        return
+    with _background_lock:
+        if _background_pid == os.getpid():
+            return
+        _background_pid = os.getpid()
+        if config.NEWS_PREWARM_TOP > 0:
+            threading.Thread(target=_news_prewarm_loop, name="news-prewarm", daemon=True).start()
+
+
+def is_valid_symbol(symbol: str) -> bool:
+    """Shape of a Yahoo symbol (AAPL, BRK-B, BTC-USD, ^GSPC, EURUSD=X), and listed if a listing is loaded."""
+    return bool(re.fullmatch(r"[A-Z0-9^][A-Z0-9.=^-]{0,14}", symbol)) and is_listed(symbol)
+
 
 @app.route("/")
 def home():
@@ -50,7 +107,7 @@ def get_bot_response():
         # Maintain simple context in session
         session.setdefault('context', {})
         context = session['context']
-        bot_response = chatbot_response(user_input.strip())
+        bot_response = chatbot_response(user_input.strip(), chart_mode=request.args.get("format", "image"))
         # Store last message
         context['last_user_input'] = user_input.strip()
         session['context'] = context
@@ -90,7 +147,6 @@ def chat():
         # Handle URL-encoded data
         elif request.data:
             try:
-                import json
                 data = json.loads(request.data.decode('utf-8'))
                 user_msg = data.get("message")
             except (json.JSONDecodeError, UnicodeDecodeError):
@@ -108,8 +164,10 @@ def chat():
         last_topic = context.get('last_topic')
         # Select mode
         mode = None
+        chart_mode = "image"
         if request.is_json and isinstance(data, dict):
             mode = data.get("mode")
+            chart_mode = data.get("format") or "image"
 
         if mode == "ai":
             # Build short context from session chat history if needed
@@ -125,7 +183,7 @@ def chat():
             history.append(("assistant", bot_response))
             session['ai_history'] = history[-10:]  # keep last 10 turns
         else:
-            bot_response = chatbot_response(user_msg.strip())
+            bot_response = chatbot_response(user_msg.strip(), chart_mode=chart_mode)
         # Update simple context
         context['last_user_input'] = user_msg.strip()
         # Naively infer last topic by extracting ticker-like tokens
@@ -142,6 +200,10 @@ def chat():
             "status": "success",
             "user_input": user_msg
         }
+        # "format": "series" replies also carry the chart data as a JSON field
+        series_tag = _re.search(r"\[series: (\{.*\})\]", bot_response)
+        if series_tag:
+            reply_json["series"] = json.loads(series_tag.group(1))
         try:
             log_chat(user_msg.strip(), bot_response, mode)
         except Exception as _:
@@ -156,12 +218,144 @@ def chat():
         }), 500
 
 
+@app.route("/stream/quotes", methods=["GET"])
+def stream_quotes():
+    """
+    Server-Sent Events stream of quotes for ?symbols=AAPL,TSLA.
+    All clients of this worker share one upstream poller.
+    """
+    symbols = []
+    for raw in request.args.get("symbols", "").split(","):
+        symbol = raw.strip().upper()
+        if symbol and symbol not in symbols:
+            symbols.append(symbol)
+    invalid = [symbol for symbol in symbols if not is_valid_symbol(symbol)]
+    if invalid:
+        return jsonify({
+            "error": "Invalid symbols",
+            "message": f"Not known symbols: {', '.join(invalid[:5])}"
+        }), 400
+    if not symbols:
+        return jsonify({
+            "error": "No symbols provided",
+            "message": "Please provide a 'symbols' parameter, e.g. ?symbols=AAPL,TSLA"
+        }), 400
+    if len(symbols) > config.QUOTE_STREAM_MAX_SYMBOLS:
+        return jsonify({
+            "error": "Too many symbols",
+            "message": f"At most {config.QUOTE_STREAM_MAX_SYMBOLS} symbols per stream"
+        }), 400
+
+    if not stream_slots.acquire(blocking=False):
+        response = jsonify({
+            "error": "Too many streams",
+            "message": "Too many open quote streams, please retry later"
+        })
+        response.headers["Retry-After"] = "30"
+        return response, 503
+
+    subscription = quote_hub.subscribe(symbols)
+    closed = []
+
+    def close():
+        # Runs from the generator and from the server's close(), whichever comes first
+        if not closed:
+            closed.append(True)
+            quote_hub.unsubscribe(subscription)
+            stream_slots.release()
+
+    def events():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    update = subscription.queue.get(timeout=15)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: quotes\ndata: {json.dumps(update)}\n\n"
+        finally:
+            close()
+
+    response = Response(events(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+    response.call_on_close(close)
+    return response
+
+
+@app.route("/api/history/<ticker>", methods=["GET"])
+def history_api(ticker):
+    """
+    Close series for client-side charts: ?days=30 (1-365), ?delta=1 for
+    delta-encoded columns (see charts.series_payload).
+    """
+    ticker = ticker.strip().upper()
+    if not is_valid_symbol(ticker):
+        return jsonify({
+            "error": "Invalid ticker",
+            "message": f"'{ticker}' is not a known symbol"
+        }), 400
+    try:
+        days = min(max(int(request.args.get("days", "30")), 1), 365)
+    except ValueError:
+        return jsonify({
+            "error": "Invalid days",
+            "message": "'days' must be an integer"
+        }), 400
+    delta = request.args.get("delta", "").lower() in ("1", "true", "yes")
+    payload = history_series_payload(ticker, days=days, delta=delta)
+    if payload is None:
+        return jsonify({
+            "error": "Not found",
+            "message": f"No history available for {ticker}"
+        }), 404
+    response = jsonify(payload)
+    response.headers["Cache-Control"] = "public, max-age=60"
+    return response
+
+
+@app.route("/chart/<ticker>/<int:days>/<chart_id>.png", methods=["GET"])
+def chart_image(ticker, days, chart_id):
+    """
+    Rendered history chart. The id changes with every new bar, so clients may
+    cache it indefinitely: at worst a cached image shows the last bar's close
+    as of when it was first drawn.
+    """
+    ticker = ticker.upper()
+    try:
+        png = chart_png(ticker, days, chart_id) if is_valid_symbol(ticker) and 1 <= days <= 365 else None
+    except RenderBusy:
+        response = jsonify({
+            "error": "Busy",
+            "message": "The chart cannot be drawn right now, please retry shortly"
+        })
+        response.headers["Retry-After"] = "5"
+        return response, 503
+    if png is None:
+        return jsonify({
+            "error": "Not found",
+            "message": "Unknown or expired chart"
+        }), 404
+    response = Response(png, mimetype="image/png")
+    response.set_etag(chart_id)
+    response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    return response.make_conditional(request)
+
+
 @app.route("/health", methods=["GET"])
 def health_check():
     """Health check endpoint."""
     return jsonify({
         "status": "healthy",
-        "service": "FinTalkBot API"
+        "service": "FinTalkBot API",
+        "cache": cache.stats(),
+        "chart_cache": chart_cache.stats(),
+        "chart_pool": render_pool.stats() if render_pool is not None else None,
+        "sentiment_memo": sentiment_analyzer.memo.stats(),
+        "quote_stream": quote_hub.stats(),
+        "upstreams": resilience.snapshot(),
     })
 
 
@@ -0,0 +1,284 @@
+# Cache backends for fetched market data
+import os
+import pickle
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Tuple
+
+from . import config
+
+
+def approx_size(value: Any) -> int:
+    """Rough in-memory footprint of a cached value, in bytes."""
+    if hasattr(value, "memory_usage"):
+        # pandas Series/DataFrame
+        try:
+            usage = value.memory_usage(deep=True)
+            return int(usage.sum()) if hasattr(usage, "sum") else int(usage)
+        except Exception:
+            pass
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, (tuple, list, set, frozenset)):
+        return sys.getsizeof(value) + sum(approx_size(v) for v in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(approx_size(k) + approx_size(v) for k, v in value.items())
+    return sys.getsizeof(value)
+
+
+class TTLCache:
+    """
+    Thread-safe in-memory LRU cache with per-entry TTL, private to the current process.
+    Bounded by max_entries and an approximate max_bytes; a background sweeper drops
+    expired entries every sweep_seconds even if they are never read again.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = 60,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        sweep_seconds: float = 30.0,
+    ):
+        # key -> (expires_at, size, value), least recently used first
+        self.store: "OrderedDict[str, Tuple[float, int, Any]]" = OrderedDict()
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sweep_seconds = sweep_seconds
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._lock = threading.Lock()
+        self._sweeper: threading.Thread | None = None
+
+    def _drop(self, key: str) -> None:
+        _, size, _ = self.store.pop(key)
+        self.bytes -= size
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            entry = self.store.get(key)
+            if entry is not None:
+                expires_at, _, value = entry
+                if now < expires_at:
+                    self.store.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._drop(key)
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: Any, ttl: float | None = None):
+        size = approx_size(key) + approx_size(value)
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if key in self.store:
+                self._drop(key)
+            if size > self.max_bytes:
+                # Would evict everything else and still not fit
+                return
+            self.store[key] = (expires_at, size, value)
+            self.bytes += size
+            while len(self.store) > self.max_entries or self.bytes > self.max_bytes:
+                self._drop(next(iter(self.store)))
+                self.evictions += 1
+        self._ensure_sweeper()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self.store:
+                self._drop(key)
+
+    def clear(self) -> None:
+        """Drop every entry; hit/miss counters are kept."""
+        with self._lock:
+            self.store.clear()
+            self.bytes = 0
+
+    def sweep(self) -> int:
+        """Drop every expired entry; returns how many were removed."""
+        now = time.time()
+        with self._lock:
+            expired = [k for k, (expires_at, _, _) in self.store.items() if expires_at <= now]
+            for key in expired:
+                self._drop(key)
+            self.expirations += len(expired)
+        return len(expired)
+
+    def _ensure_sweeper(self) -> None:
+        # Started lazily so forked workers (gunicorn --preload) get their own thread
+        if self.sweep_seconds <= 0 or (self._sweeper is not None and self._sweeper.is_alive()):
+            return
+        with self._lock:
+            if self._sweeper is not None and self._sweeper.is_alive():
+                return
+            self._sweeper = threading.Thread(target=self._sweep_loop, name="cache-sweeper", daemon=True)
+            self._sweeper.start()
+
+    def _sweep_loop(self) -> None:
+        while True:
+            time.sleep(self.sweep_seconds)
+            self.sweep()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "entries": len(self.store),
+                "bytes": self.bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
+
+
+class SQLiteTTLCache:
+    """
+    TTL cache stored in a SQLite file, shared by every process that opens the same path
+    (gunicorn workers, restarts). Values are pickled; hit/miss counters are per process.
+    """
+
+    # Expired rows are purged every this many writes
+    PURGE_EVERY = 200
+
+    def __init__(self, path: str, ttl_seconds: int = 60):
+        self.path = path
+        self.ttl = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with sqlite3.connect(path) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+                """
+            )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str):
+        try:
+            row = self._conn().execute(
+                "SELECT value FROM cache WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+            if row is not None:
+                self.hits += 1
+                return pickle.loads(row[0])
+        except Exception:
+            pass
+        self.misses += 1
+        return None
+
+    def set(self, key: str, value: Any, ttl: float | None = None):
+        now = time.time()
+        try:
+            conn = self._conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache(key, value, expires_at) VALUES (?,?,?)",
+                (key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), now + (self.ttl if ttl is None else ttl)),
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+        except Exception:
+            pass
+
+    def delete(self, key: str) -> None:
+        try:
+            self._conn().execute("DELETE FROM cache WHERE key = ?", (key,))
+        except Exception:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "sqlite", "path": self.path, "hits": self.hits, "misses": self.misses}
+
+
+def make_cache(ttl_seconds: int = 60):
+    """Build the cache backend selected by config.CACHE_BACKEND."""
+    if config.CACHE_BACKEND == "sqlite":
+        return SQLiteTTLCache(config.CACHE_DB_PATH, ttl_seconds=ttl_seconds)
+    return TTLCache(
+        ttl_seconds=ttl_seconds,
+        max_entries=config.CACHE_MAX_ENTRIES,
+        max_bytes=config.CACHE_MAX_BYTES,
+        sweep_seconds=config.CACHE_SWEEP_SECS,
+    )
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls per key: the first caller runs the fetch, later callers
+    for the same key wait up to wait_seconds for its result instead of fetching again.
+    """
+
+    def __init__(self, wait_seconds: float = 15.0):
+        self.wait_seconds = wait_seconds
+        self.leaders = 0
+        self.coalesced = 0
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            if not call.done.wait(self.wait_seconds):
+                raise TimeoutError(f"Timed out waiting for in-flight fetch of {key}")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"leaders": self.leaders, "coalesced": self.coalesced, "in_flight": len(self._calls)}
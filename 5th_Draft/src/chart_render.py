@@ -0,0 +1,156 @@
+# History chart rendering without pyplot's global figure manager
+import concurrent.futures
+import io
+import multiprocessing
+import os
+import threading
+from typing import Any, Dict, Optional
+
+import numpy as np
+from matplotlib import dates as mdates
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+FIGSIZE = (4, 2.2)
+DPI = 150
+
+
+class TemplateChart:
+    """
+    One pre-built figure whose line data, limits and title are swapped per render.
+    Axes, grid, locators and layout are set up once; a lock serialises renders
+    because a Figure is not safe to draw from two threads at once.
+    """
+
+    def __init__(self):
+        self.figure = Figure(figsize=FIGSIZE, dpi=DPI)
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.ax = self.figure.add_subplot()
+        (self.line,) = self.ax.plot([], [], marker="o", linewidth=1.5)
+        # Daily bars: a handful of ticks labelled month-day
+        self.ax.xaxis.set_major_locator(mdates.AutoDateLocator(minticks=3, maxticks=6))
+        self.ax.xaxis.set_major_formatter(mdates.DateFormatter("%m-%d"))
+        self.ax.grid(True, linestyle="--", alpha=0.3)
+        self.ax.tick_params(axis="x", labelrotation=45)
+        self.ax.tick_params(labelsize=8)
+        # Fixed margins in place of a tight_layout() pass on every render
+        self.figure.subplots_adjust(left=0.16, right=0.96, top=0.88, bottom=0.25)
+        self.lock = threading.Lock()
+
+    def render(self, title: str, dates: np.ndarray, closes: np.ndarray) -> bytes:
+        x = mdates.date2num(np.asarray(dates, dtype="datetime64[ns]"))
+        y = np.asarray(closes, dtype="f8")
+        with self.lock:
+            self.line.set_data(x, y)
+            self.ax.relim()
+            self.ax.autoscale_view()
+            self.ax.set_title(title)
+            buf = io.BytesIO()
+            self.canvas.print_png(buf)
+            return buf.getvalue()
+
+
+_template: Optional[TemplateChart] = None
+_template_lock = threading.Lock()
+
+
+def template() -> TemplateChart:
+    """This process's template chart, built on first use."""
+    global _template
+    with _template_lock:
+        if _template is None:
+            _template = TemplateChart()
+        return _template
+
+
+def render_png(ticker: str, dates: np.ndarray, closes: np.ndarray) -> bytes:
+    return template().render(f"{ticker} - Last {len(closes)} days", dates, closes)
+
+
+def render_png_pyplot(ticker: str, dates: np.ndarray, closes: np.ndarray) -> bytes:
+    """The original pyplot renderer, kept as a fallback."""
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=FIGSIZE, dpi=DPI)
+    try:
+        ax.plot(np.asarray(dates, dtype="datetime64[ns]"), closes, marker="o", linewidth=1.5)
+        ax.set_title(f"{ticker} - Last {len(closes)} days")
+        ax.grid(True, linestyle="--", alpha=0.3)
+        ax.tick_params(axis="x", labelrotation=45)
+        fig.tight_layout()
+        buf = io.BytesIO()
+        fig.savefig(buf, format="png")
+        return buf.getvalue()
+    finally:
+        plt.close(fig)
+
+
+def _warm_worker() -> None:
+    """Pool initializer: import matplotlib and build the template before the first job."""
+    template()
+
+
+class RenderBusy(RuntimeError):
+    """The render pool was full, or the render did not finish in time."""
+
+
+class RenderPool:
+    """
+    Optional process pool for chart renders, so a render does not hold the GIL of a
+    threaded web worker. At most `max_pending` renders are queued or running; past
+    that, and after `timeout_seconds`, render() raises RenderBusy and the caller
+    answers without an image. A failed render returns None.
+    """
+
+    def __init__(self, workers: int, max_pending: int, timeout_seconds: float):
+        self.workers = workers
+        self.timeout = timeout_seconds
+        self.rendered = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        self._executor_pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> concurrent.futures.ProcessPoolExecutor:
+        with self._lock:
+            # A forked web worker must not reuse its parent's executor
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_warm_worker,
+                )
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def render(self, ticker: str, dates: np.ndarray, closes: np.ndarray) -> Optional[bytes]:
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise RenderBusy("render pool is full")
+        try:
+            future = self._pool().submit(render_png, ticker, np.asarray(dates), np.asarray(closes))
+        except Exception:
+            self._slots.release()
+            return None
+        # The slot is held until the render finishes, even if this caller gave up on it
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            png = future.result(timeout=self.timeout)
+        except concurrent.futures.TimeoutError:
+            self.timeouts += 1
+            future.cancel()
+            raise RenderBusy(f"render took over {self.timeout}s")
+        except Exception:
+            return None
+        self.rendered += 1
+        return png
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "rendered": self.rendered,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+        }
@@ -0,0 +1,148 @@
+# Content-addressed history charts served from /chart/<ticker>/<days>/<id>.png
+import hashlib
+import re
+from urllib.parse import quote
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from . import config, market_hours
+from .chart_render import RenderBusy
+from .cache import TTLCache
+from .data_fetcher import get_history_series, render_history_png
+
+CHART_ID_RE = re.compile(r"^[0-9a-f]{40}$")
+
+# Rendered PNGs, private to this worker and bounded by bytes
+chart_cache = TTLCache(
+    ttl_seconds=config.CHART_CACHE_TTL_SECS,
+    max_entries=config.CHART_CACHE_MAX_ENTRIES,
+    max_bytes=config.CHART_CACHE_MAX_BYTES,
+)
+
+
+def chart_id(ticker: str, days: int, series) -> str:
+    """
+    Id of the chart for this data: (ticker, window, last bar timestamp). A new bar
+    yields a new id. The close is left out so that workers holding copies of the
+    series fetched at different times during a session still agree on the id.
+    """
+    last_ts = int(pd.Timestamp(series.index[-1]).timestamp())
+    key = f"{ticker}|{days}|{len(series)}|{last_ts}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def history_chart_url(ticker: str, days: int = 5) -> Optional[str]:
+    """Render (or reuse) the history chart and return its /chart URL, or None."""
+    series = get_history_series(ticker, days=days)
+    if series is None or series.empty:
+        return None
+    cid = chart_id(ticker, days, series)
+    key = f"{ticker}/{days}/{cid}"
+    if chart_cache.get(key) is None:
+        try:
+            png = render_history_png(ticker, series)
+        except RenderBusy:
+            return None
+        if png is None:
+            return None
+        chart_cache.set(key, png)
+    # Ticker and window are in the URL, so whichever worker gets the request can re-render it
+    return f"/chart/{quote(ticker, safe='')}/{days}/{cid}.png"
+
+
+SPARK_BARS = "▁▂▃▄▅▆▇█"
+
+
+def sparkline(closes: np.ndarray) -> str:
+    """One block character per close, scaled between the window's min and max."""
+    lo, hi = closes.min(), closes.max()
+    if hi == lo:
+        return SPARK_BARS[len(SPARK_BARS) // 2] * len(closes)
+    levels = np.rint((closes - lo) / (hi - lo) * (len(SPARK_BARS) - 1)).astype(int)
+    return "".join(SPARK_BARS[i] for i in levels)
+
+
+def series_stats(ticker: str, closes: np.ndarray) -> Dict[str, Optional[float]]:
+    """min/max/last, % change over the window and annualized realized volatility (%)."""
+    first, last = closes[0], closes[-1]
+    returns = np.diff(np.log(closes))
+    # Crypto trades every day of the year
+    periods = 365 if market_hours.symbol_class(ticker) == "crypto" else 252
+    return {
+        "min": float(closes.min()),
+        "max": float(closes.max()),
+        "last": float(last),
+        "change_pct": float((last - first) / first * 100.0) if first else None,
+        "volatility_pct": float(returns.std(ddof=1) * np.sqrt(periods) * 100.0) if len(returns) > 1 else None,
+    }
+
+
+def history_text_summary(ticker: str, days: int = 5) -> Optional[str]:
+    """Image-free history reply: a sparkline and summary stats of the close series."""
+    series = get_history_series(ticker, days=days)
+    if series is None or series.empty:
+        return None
+    closes = series.to_numpy(dtype="f8")
+    stats = series_stats(ticker, closes)
+    line = f"Last {stats['last']:.2f} | Min {stats['min']:.2f} | Max {stats['max']:.2f}"
+    if stats["change_pct"] is not None:
+        line += f" | Change {stats['change_pct']:+.2f}%"
+    if stats["volatility_pct"] is not None:
+        line += f" | Vol {stats['volatility_pct']:.1f}% ann."
+    return f"📉 {ticker} - Last {len(closes)} days\n{sparkline(closes)}\n{line}"
+
+
+# Closes are sent as integers in units of 1/SERIES_SCALE when delta-encoded
+SERIES_SCALE = 10000
+
+
+def series_payload(ticker: str, series, delta: bool = False) -> Dict[str, Any]:
+    """
+    Columnar JSON for client-side charts: epoch-second timestamps `t` and closes `c`.
+    With delta=True both columns hold the first value followed by successive
+    differences, closes as integers scaled by SERIES_SCALE.
+    """
+    t = series.index.values.astype("datetime64[s]").astype("i8")
+    closes = series.to_numpy(dtype="f8")
+    payload: Dict[str, Any] = {"ticker": ticker, "days": len(closes)}
+    if delta:
+        c = np.rint(closes * SERIES_SCALE).astype("i8")
+        payload.update({
+            "delta": True,
+            "scale": SERIES_SCALE,
+            "t": np.diff(t, prepend=0).tolist(),
+            "c": np.diff(c, prepend=0).tolist(),
+        })
+    else:
+        payload.update({"t": t.tolist(), "c": np.round(closes, 4).tolist()})
+    return payload
+
+
+def history_series_payload(ticker: str, days: int = 5, delta: bool = False) -> Optional[Dict[str, Any]]:
+    series = get_history_series(ticker, days=days)
+    if series is None or series.empty:
+        return None
+    return series_payload(ticker, series, delta=delta)
+
+
+def chart_png(ticker: str, days: int, cid: str) -> Optional[bytes]:
+    """
+    PNG bytes for a chart URL, re-rendered from (ticker, window) if this worker has
+    none; None if its data has moved on. Raises RenderBusy if it cannot be drawn now.
+    """
+    if not CHART_ID_RE.match(cid):
+        return None
+    key = f"{ticker}/{days}/{cid}"
+    png = chart_cache.get(key)
+    if png is not None:
+        return png
+    series = get_history_series(ticker, days=days)
+    # The data has moved on since the URL was issued; its content is gone
+    if series is None or series.empty or chart_id(ticker, days, series) != cid:
+        return None
+    png = render_history_png(ticker, series)
+    if png is not None:
+        chart_cache.set(key, png)
+    return png
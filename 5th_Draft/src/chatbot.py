@@ -1,13 +1,20 @@
 # src/chatbot.py
+import json
 import re
+from collections import Counter
 from typing import List, Tuple, Optional
+from . import config
+from .symbols import looks_like_ticker
 from .data_fetcher import (
     get_stock_price,
     get_finance_news,
     get_price_details,
-    generate_history_chart_base64,
+    get_price_details_many,
+    track_staleness,
 )
-from .sentiment_analyzer import analyze_sentiment
+from .charts import history_chart_url, history_series_payload, history_text_summary
+from .sentiment_analyzer import analyze_sentiment_batch, headline_hash, label_for
+from .storage import recent_user_messages, record_headline_sentiment, ticker_sentiment
 
 
 ALIASES = {
@@ -29,6 +36,11 @@ KNOWN_NAMES = {
 }
 
 
+def _caps_signal(user_input: str) -> bool:
+    """Capitals mark a symbol only when the whole message is not typed in capitals."""
+    return not user_input.isupper()
+
+
 def extract_ticker_symbol(user_input: str) -> Optional[str]:
     """
     Extract ticker symbol from user input.
@@ -40,16 +52,11 @@ def extract_ticker_symbol(user_input: str) -> Optional[str]:
         if name in lowered:
             return ticker
 
-    user_input = user_input.upper()
-    
-    # Pattern to match common ticker symbols (2-5 uppercase letters)
-    ticker_pattern = r'\b[A-Z]{2,5}\b'
-    matches = re.findall(ticker_pattern, user_input)
-    
-    # Filter out common words that might match the pattern
-    exclude_words = {'PRICE', 'STOCK', 'NEWS', 'WHAT', 'THE', 'OF', 'IS', 'FOR'}
-    valid_tickers = [match for match in matches if match not in exclude_words]
-    
+    # Ticker-like words (2-5 letters); common words only count when typed in capitals
+    matches = re.findall(r'\b[A-Za-z]{2,5}\b', user_input)
+    caps = _caps_signal(user_input)
+    valid_tickers = [m.upper() for m in matches if looks_like_ticker(m, typed_in_caps=caps and m.isupper())]
+
     return valid_tickers[0] if valid_tickers else None
 
 
@@ -62,9 +69,12 @@ def extract_all_tickers(user_input: str) -> List[str]:
             found.append(ticker)
     # Add explicit ticker-like items
     matches = re.findall(r"\b[A-Za-z.-]{2,6}\b", user_input)
+    caps = _caps_signal(user_input)
     for token in matches:
         token_up = token.upper()
-        if token_up.isalpha() and 2 <= len(token_up) <= 5:
+        if token.lower() in ALIASES or token.lower() in KNOWN_NAMES:
+            continue
+        if token_up.isalpha() and 2 <= len(token_up) <= 5 and looks_like_ticker(token, typed_in_caps=caps and token.isupper()):
             found.append(token_up)
         elif token_up in {"BTC-USD", "ETH-USD"}:
             found.append(token_up)
@@ -78,14 +88,39 @@ def extract_all_tickers(user_input: str) -> List[str]:
     return unique
 
 
-def format_news_with_sentiment(news_data: List[Tuple[str, str]]) -> str:
+def extract_news_ticker(user_input: str) -> Optional[str]:
+    """
+    Ticker for a news request: a known name/alias, or a symbol typed in capitals
+    ('NVDA news'). Lowercase words are not treated as tickers here, so a generic
+    'show me finance news' stays generic.
+    """
+    lowered = user_input.lower()
+    for name, ticker in {**ALIASES, **KNOWN_NAMES}.items():
+        if name in lowered:
+            return ticker
+    caps = _caps_signal(user_input)
+    for token in re.findall(r"\b[A-Z]{2,5}(?:-USD)?\b", user_input):
+        if looks_like_ticker(token, typed_in_caps=caps):
+            return token
+    return None
+
+
+def news_query_for(ticker: str) -> str:
+    """Google News search term for a ticker."""
+    if ticker.endswith("-USD"):
+        return f"{ticker[:-4]} crypto"
+    return f"{ticker} stock"
+
+
+def format_news_with_sentiment(news_data: List[Tuple[str, str]], ticker: Optional[str] = None) -> str:
     """
     Format news data with sentiment analysis into a readable string.
     """
     if not news_data:
         return "No news available at the moment."
     
-    formatted_news = ["Here are the latest finance news with sentiment analysis:\n"]
+    subject = f"{ticker} news" if ticker else "finance news"
+    formatted_news = [f"Here are the latest {subject} with sentiment analysis:\n"]
     
     for i, (news_item, sentiment) in enumerate(news_data[:5], 1):  # Limit to 5 items
         formatted_news.append(f"{i}. {news_item}")
@@ -94,6 +129,34 @@ def format_news_with_sentiment(news_data: List[Tuple[str, str]]) -> str:
     return "\n".join(formatted_news)
 
 
+def score_news(news: List[str], ticker: Optional[str] = None) -> List[Tuple[str, float]]:
+    """Score headlines and, for a ticker, fold them into its rolling sentiment index."""
+    scores = analyze_sentiment_batch(news)
+    if scores is None:
+        # No scorer: shown as Neutral, but never stored as a score
+        return [("Neutral", 0.0) for _ in news]
+    if ticker:
+        try:
+            record_headline_sentiment(
+                ticker, config.SENTIMENT_ENGINE, [(headline_hash(h), c) for h, (_, c) in zip(news, scores)]
+            )
+        except Exception:
+            pass
+    return scores
+
+
+def format_sentiment_summary(summary: dict) -> str:
+    ticker = summary["ticker"]
+    lines = [f"🧭 {ticker} news sentiment:"]
+    for window in ("24h", "7d"):
+        avg, weight = summary[f"avg_{window}"], summary[f"weight_{window}"]
+        if avg is None or weight < 0.5:
+            lines.append(f"- {window}: no recent headlines")
+        else:
+            lines.append(f"- {window}: {label_for(avg)} ({avg:+.2f}, ~{weight:.0f} headlines)")
+    return "\n".join(lines)
+
+
 def format_price_response(ticker: str, price: float, currency: Optional[str], change_pct: Optional[float]) -> str:
     arrow = "▲" if (change_pct is not None and change_pct >= 0) else "▼"
     change_str = f"{arrow} {change_pct:+.2f}%" if change_pct is not None else "—"
@@ -111,23 +174,55 @@ def format_help() -> str:
         "• Price: 'price of AAPL' or 'What's the price of Apple?'\n"
         "• News: 'Tesla news'\n"
         "• History: 'AAPL history' (last 5 days, with chart)\n"
+        "• Sentiment: 'Tesla sentiment' (rolling news sentiment, 24h and 7d)\n"
         "• Compare: 'Compare Apple and Tesla'\n"
         "• Help: '/help' or 'what can you do'"
     )
 
 
-def chatbot_response(user_input: str) -> str:
+def format_data_age(age_seconds: float) -> str:
+    if age_seconds < 120:
+        return f"{int(age_seconds)}s"
+    if age_seconds < 7200:
+        return f"{int(age_seconds // 60)} min"
+    return f"{age_seconds / 3600:.1f} h"
+
+
+def add_staleness_note(reply: str, age_seconds: float) -> str:
+    """Insert a 'served from cache' note under the first line of a reply."""
+    note = f"⏱ Cached data from {format_data_age(age_seconds)} ago (refreshing in background)"
+    first, sep, rest = reply.partition("\n")
+    return f"{first}\n{note}{sep}{rest}"
+
+
+# How history replies carry the chart: a /chart image URL, the series for the client
+# to draw, or a text sparkline with summary stats
+CHART_MODES = ("image", "series", "text")
+
+
+def chatbot_response(user_input: str, chart_mode: str = "image") -> str:
     """
     Enhanced chatbot logic for finance-related queries.
     Handles greetings, stock prices, and news requests.
+    Replies built from stale cached data say how old that data is.
     """
+    if chart_mode not in CHART_MODES:
+        chart_mode = "image"
+    with track_staleness() as staleness:
+        reply = _chatbot_reply(user_input, chart_mode)
+    if staleness.max_age is not None:
+        reply = add_staleness_note(reply, staleness.max_age)
+    return reply
+
+
+def _chatbot_reply(user_input: str, chart_mode: str = "image") -> str:
     if not user_input or not isinstance(user_input, str):
         return "I didn't receive any input. Please ask me about stocks or finance!"
     
     user_input_lower = user_input.lower().strip()
     
     # Handle greetings
-    if any(greeting in user_input_lower for greeting in ["hello", "hi", "hey", "good morning", "good afternoon"]):
+    if any(re.search(rf"\b{greeting}\b", user_input_lower) for greeting in ["hello", "hi", "hey", "good morning", "good afternoon"]):
         return "Hello! 👋 I'm FinTalkBot. How can I help you with stocks today?"
     
     # Handle "how are you" queries
@@ -144,8 +239,9 @@ def chatbot_response(user_input: str) -> str:
         if len(tickers) < 2:
             return "Please specify at least two tickers or names to compare (e.g., 'Compare Apple and Tesla')."
         lines: List[str] = ["🔁 Comparison:"]
+        details_by_ticker = get_price_details_many(tickers[:5])
         for t in tickers[:5]:
-            details = get_price_details(t)
+            details = details_by_ticker.get(t)
             if not details:
                 lines.append(f"- {t}: Not found or unavailable")
                 continue
@@ -171,26 +267,60 @@ def chatbot_response(user_input: str) -> str:
     # Handle news queries
     elif "news" in user_input_lower:
         try:
-            news = get_finance_news()
+            ticker = extract_news_ticker(user_input)
+            news = get_finance_news(query=news_query_for(ticker) if ticker else None)
             if not news:
                 return "No finance news available at the moment. Please try again later."
             
-            analyzed_news = [(news_item, analyze_sentiment(news_item)) for news_item in news]
-            return format_news_with_sentiment(analyzed_news)
+            analyzed_news = [(item, label) for item, (label, _) in zip(news, score_news(news, ticker))]
+            return format_news_with_sentiment(analyzed_news, ticker)
         except Exception as e:
             return "Error fetching finance news. Please try again later."
 
+    # Rolling per-ticker sentiment, scraping news only when the index has nothing recent
+    elif "sentiment" in user_input_lower:
+        ticker = extract_news_ticker(user_input) or extract_ticker_symbol(user_input)
+        if not ticker:
+            return "Please specify a ticker for sentiment, e.g., 'Tesla sentiment'."
+        try:
+            summary = ticker_sentiment(ticker, config.SENTIMENT_ENGINE)
+            if summary is None or summary["weight_24h"] < 0.5:
+                news = get_finance_news(query=news_query_for(ticker))
+                if news:
+                    score_news(news, ticker)
+                summary = ticker_sentiment(ticker, config.SENTIMENT_ENGINE)
+            if summary is None:
+                return f"No news sentiment available for {ticker} yet. Please try again later."
+            return format_sentiment_summary(summary)
+        except Exception as e:
+            return f"Error fetching sentiment for {ticker}. Please try again later."
+
     # Handle history queries
     elif "history" in user_input_lower:
         ticker = extract_ticker_symbol(user_input)
         if not ticker:
             return "Please specify a ticker for history, e.g., 'AAPL history'."
-        chart_b64 = generate_history_chart_base64(ticker, days=5)
-        if not chart_b64:
+        if chart_mode == "text":
+            summary = history_text_summary(ticker, days=5)
+            return summary or f"Sorry, I couldn’t find history for {ticker}. Try again later."
+        if chart_mode == "series":
+            payload = history_series_payload(ticker, days=5, delta=True)
+            if not payload:
+                return f"Sorry, I couldn’t find history for {ticker}. Try again later."
+            return (
+                f"📉 {ticker} - Last {payload['days']} days\n"
+                f"[series: {json.dumps(payload, separators=(',', ':'))}]"
+            )
+        chart_url = history_chart_url(ticker, days=5)
+        if not chart_url:
+            # No image (render pool busy or rendering failed): answer with the numbers
+            summary = history_text_summary(ticker, days=5)
+            if summary:
+                return summary
             return f"Sorry, I couldn’t generate history for {ticker}. Try again later."
         return (
             f"📉 {ticker} - Last 5 days\n"
-            f"[chart: data:image/png;base64,{chart_b64}]"
+            f"[chart: {chart_url}]"
         )
     
     # Handle general stock queries
@@ -206,6 +336,31 @@ def chatbot_response(user_input: str) -> str:
         )
 
 
+def popular_news_tickers(messages: List[str], top: int) -> List[str]:
+    """Most requested tickers among news requests in `messages`."""
+    counts: Counter = Counter()
+    for message in messages:
+        if "news" in message.lower():
+            ticker = extract_news_ticker(message)
+            if ticker:
+                counts[ticker] += 1
+    return [ticker for ticker, _ in counts.most_common(top)]
+
+
+def prewarm_popular_news() -> List[str]:
+    """
+    Fetch news for the tickers most asked about in recent chats, so their first
+    request of the day is served from cache. Returns the tickers warmed.
+    """
+    messages = recent_user_messages(since_hours=config.NEWS_PREWARM_LOOKBACK_HOURS)
+    tickers = popular_news_tickers(messages, config.NEWS_PREWARM_TOP)
+    for ticker in tickers:
+        news = get_finance_news(query=news_query_for(ticker))
+        if news:
+            score_news(news, ticker)
+    return tickers
+
+
 # Example usage and testing
 if __name__ == "__main__":
     # Test cases
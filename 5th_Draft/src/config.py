@@ -26,11 +26,102 @@ LOG_FILE: str | None = os.getenv("LOG_FILE")
 
 # Data fetching
 NEWS_QUERY: str = os.getenv("NEWS_QUERY", "stock market")
+# Periodically pre-warm news for the tickers most requested in recent chats
+NEWS_PREWARM_TOP: int = int(os.getenv("NEWS_PREWARM_TOP", "5"))
+NEWS_PREWARM_INTERVAL_SECS: float = float(os.getenv("NEWS_PREWARM_INTERVAL_SECS", "300"))
+NEWS_PREWARM_LOOKBACK_HOURS: float = float(os.getenv("NEWS_PREWARM_LOOKBACK_HOURS", "24"))
+# Parse only headline nodes of the news page; the full-tree parse stays as fallback
+NEWS_FAST_PARSE: bool = _get_bool("NEWS_FAST_PARSE", True)
 REQUEST_TIMEOUT_SECS: float = float(os.getenv("REQUEST_TIMEOUT_SECS", "10"))
 USER_AGENT: str = os.getenv(
     "USER_AGENT",
     "FinTalkBot/1.0 (+https://example.com) Python-requests",
 )
+# Shared outbound HTTP session: keep-alive pool size; failed requests are retried
+# with backoff, each attempt counted by the upstream circuit breaker
+HTTP_POOL_SIZE: int = int(os.getenv("HTTP_POOL_SIZE", "10"))
+HTTP_RETRIES: int = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_BACKOFF_SECS: float = float(os.getenv("HTTP_BACKOFF_SECS", "0.5"))
+
+# Caching
+CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "memory").lower()  # memory | sqlite
+CACHE_DB_PATH: str = os.getenv(
+    "CACHE_DB_PATH",
+    os.path.join(os.path.dirname(__file__), "cache.sqlite3"),
+)
+CACHE_MAX_ENTRIES: int = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+CACHE_MAX_BYTES: int = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_SWEEP_SECS: float = float(os.getenv("CACHE_SWEEP_SECS", "30"))
+# Stale-while-revalidate: values are fresh for the soft TTL, then served stale while
+# one background refresh runs, and dropped at the hard TTL
+CACHE_SWR: bool = _get_bool("CACHE_SWR", True)
+CACHE_SOFT_TTL_SECS: float = float(os.getenv("CACHE_SOFT_TTL_SECS", "60"))
+CACHE_HARD_TTL_SECS: float = float(os.getenv("CACHE_HARD_TTL_SECS", "600"))
+# Market-hours-aware TTLs: quotes/history of closed markets stay fresh until the next open
+MARKET_HOURS_TTL: bool = _get_bool("MARKET_HOURS_TTL", True)
+QUOTE_TTL_OPEN_SECS: float = float(os.getenv("QUOTE_TTL_OPEN_SECS", "60"))
+HISTORY_TTL_OPEN_SECS: float = float(os.getenv("HISTORY_TTL_OPEN_SECS", "300"))
+# On-disk daily bar store: only missing bars are fetched, any window is served from disk
+HISTORY_STORE: bool = _get_bool("HISTORY_STORE", True)
+HISTORY_DIR: str = os.getenv("HISTORY_DIR", os.path.join(os.path.dirname(__file__), "history"))
+HISTORY_BACKFILL_DAYS: int = int(os.getenv("HISTORY_BACKFILL_DAYS", "260"))
+# After a failed or empty sync, stored bars are served without going upstream for this long
+HISTORY_RETRY_SECS: float = float(os.getenv("HISTORY_RETRY_SECS", "60"))
+# How long a request waits for another request's in-flight fetch of the same key
+SINGLEFLIGHT_WAIT_SECS: float = float(os.getenv("SINGLEFLIGHT_WAIT_SECS", "15"))
+# Unlisted symbols the upstream returned no data for are not retried for this long
+# (short: yfinance also answers a timeout or 5xx with no data)
+NEGATIVE_TTL_SECS: float = float(os.getenv("NEGATIVE_TTL_SECS", "300"))
+# Optional exchange listing (Nasdaq Trader pipe file, CSV with a Symbol column, or one per line)
+SYMBOL_LIST_PATH: str = os.getenv("SYMBOL_LIST_PATH", os.path.join(os.path.dirname(__file__), "data", "listed_symbols.txt"))
+
+# Rendered history charts served from /chart/<ticker>/<days>/<id>.png (per-worker, bounded by bytes)
+CHART_RENDERER: str = os.getenv("CHART_RENDERER", "fast").lower()  # fast | pyplot
+# Render charts in a process pool (0 = in the request thread); overflow gets a text reply
+CHART_POOL_WORKERS: int = int(os.getenv("CHART_POOL_WORKERS", "0"))
+CHART_POOL_MAX_PENDING: int = int(os.getenv("CHART_POOL_MAX_PENDING", "4"))
+CHART_RENDER_TIMEOUT_SECS: float = float(os.getenv("CHART_RENDER_TIMEOUT_SECS", "5"))
+
+# Headline sentiment: vader (generic) | finance (domain phrase lexicon) | sklearn (hashed linear model)
+SENTIMENT_ENGINE: str = os.getenv("SENTIMENT_ENGINE", "vader").lower()
+FINANCE_LEXICON_PATH: str = os.getenv("FINANCE_LEXICON_PATH") or os.path.join(
+    os.path.dirname(__file__), "data", "finance_lexicon.tsv"
+)
+# Trained with: python -m src.sentiment_model
+SENTIMENT_MODEL_PATH: str = os.getenv("SENTIMENT_MODEL_PATH") or os.path.join(
+    os.path.dirname(__file__), "data", "sentiment_model.npz"
+)
+# VADER lexicon file (vader_lexicon.txt); empty = look it up under NLTK_DATA. Nothing is downloaded.
+VADER_LEXICON_PATH: str = os.getenv("VADER_LEXICON_PATH", "")
+# Build the analyzer at import time, so a gunicorn --preload master shares it with its workers
+SENTIMENT_PRELOAD: bool = _get_bool("SENTIMENT_PRELOAD", False)
+# Sentiment scores memoized per headline (bounded LRU)
+SENTIMENT_MEMO_SIZE: int = int(os.getenv("SENTIMENT_MEMO_SIZE", "4096"))
+SENTIMENT_MEMO_TTL_SECS: float = float(os.getenv("SENTIMENT_MEMO_TTL_SECS", "86400"))
+CHART_CACHE_TTL_SECS: float = float(os.getenv("CHART_CACHE_TTL_SECS", "86400"))
+CHART_CACHE_MAX_ENTRIES: int = int(os.getenv("CHART_CACHE_MAX_ENTRIES", "512"))
+CHART_CACHE_MAX_BYTES: int = int(os.getenv("CHART_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+
+# Upstream protection: per-upstream circuit breakers and adaptive token buckets
+BREAKER_FAILURES: int = int(os.getenv("BREAKER_FAILURES", "5"))
+BREAKER_RESET_SECS: float = float(os.getenv("BREAKER_RESET_SECS", "30"))
+RATE_LIMIT_WAIT_SECS: float = float(os.getenv("RATE_LIMIT_WAIT_SECS", "1"))
+YAHOO_RATE_PER_SEC: float = float(os.getenv("YAHOO_RATE_PER_SEC", "5"))
+YAHOO_BURST: float = float(os.getenv("YAHOO_BURST", "10"))
+NEWS_RATE_PER_SEC: float = float(os.getenv("NEWS_RATE_PER_SEC", "1"))
+NEWS_BURST: float = float(os.getenv("NEWS_BURST", "5"))
+
+# Live quote stream (/stream/quotes): yahoo | fake
+QUOTE_STREAM_SOURCE: str = os.getenv("QUOTE_STREAM_SOURCE", "yahoo").lower()
+QUOTE_STREAM_INTERVAL_SECS: float = float(os.getenv("QUOTE_STREAM_INTERVAL_SECS", "5"))
+QUOTE_STREAM_MAX_SYMBOLS: int = int(os.getenv("QUOTE_STREAM_MAX_SYMBOLS", "20"))
+# Open streams per worker; keep it below gunicorn --threads so /chat always gets a thread
+QUOTE_STREAM_MAX_CLIENTS: int = int(os.getenv("QUOTE_STREAM_MAX_CLIENTS", "4"))
+
+# Record/replay of upstream responses: live | record | replay
+FETCH_MODE: str = os.getenv("FETCH_MODE", "live").lower()
+FIXTURES_DIR: str = os.getenv("FIXTURES_DIR", os.path.join(os.path.dirname(__file__), "fixtures"))
+REPLAY_LATENCY_MS: float = float(os.getenv("REPLAY_LATENCY_MS", "0"))
 
 # Sessions
 SECRET_KEY: str = os.getenv("SECRET_KEY", "dev-secret-change-me")
@@ -1,41 +1,215 @@
 # Fetch stock data
 import yfinance as yf
 import requests
-from bs4 import BeautifulSoup
-from . import config
-from typing import List, Tuple, Optional, Dict, Any
-import io
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, SoupStrainer
+from . import config, market_hours, replay, resilience, symbols
+from typing import List, Tuple, Optional, Dict, Any, Callable
+import json
 import base64
+import os
+import threading
+import time
+from contextlib import contextmanager
 import matplotlib
 
-# Use a non-interactive backend suitable for servers
+try:
+    import lxml  # type: ignore  # noqa: F401
+    FAST_HTML_PARSER = "lxml"
+except Exception:
+    FAST_HTML_PARSER = "html.parser"
+
+# Use a non-interactive backend suitable for servers (pyplot is only loaded by the fallback renderer)
 matplotlib.use("Agg")
-import matplotlib.pyplot as plt  # noqa: E402
 
-# Simple in-memory TTL cache
-import time
+from . import chart_render  # noqa: E402
+from .cache import TTLCache, SingleFlight, make_cache  # noqa: E402,F401
+from .history_store import HistoryStore  # noqa: E402
 
+cache = make_cache(ttl_seconds=60)
+# Only one upstream fetch per cache key at a time; concurrent misses wait for it
+flight = SingleFlight(wait_seconds=config.SINGLEFLIGHT_WAIT_SECS)
 
-class TTLCache:
-    def __init__(self, ttl_seconds: int = 60):
-        self.store: Dict[str, Tuple[float, Any]] = {}
-        self.ttl = ttl_seconds
+_http_session: Optional[requests.Session] = None
+_http_session_pid: Optional[int] = None
+_http_session_lock = threading.Lock()
 
-    def get(self, key: str):
-        now = time.time()
-        if key in self.store:
-            ts, value = self.store[key]
-            if now - ts < self.ttl:
-                return value
-            else:
-                del self.store[key]
-        return None
 
-    def set(self, key: str, value: Any):
-        self.store[key] = (time.time(), value)
+def http_session() -> requests.Session:
+    """
+    Shared keep-alive HTTP session for outbound fetchers, with a bounded connection pool.
+    Rebuilt after a fork so workers never share sockets. It does not retry; see
+    _guarded_with_retries.
+    """
+    global _http_session, _http_session_pid
+    if _http_session is not None and _http_session_pid == os.getpid():
+        return _http_session
+    with _http_session_lock:
+        if _http_session is None or _http_session_pid != os.getpid():
+            adapter = HTTPAdapter(
+                pool_connections=config.HTTP_POOL_SIZE,
+                pool_maxsize=config.HTTP_POOL_SIZE,
+                max_retries=0,
+            )
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({"User-Agent": config.USER_AGENT})
+            _http_session = session
+            _http_session_pid = os.getpid()
+    return _http_session
+
+
+def http_get(url: str, **kwargs) -> requests.Response:
+    """GET through the shared session with the configured timeout."""
+    kwargs.setdefault("timeout", config.REQUEST_TIMEOUT_SECS)
+    return http_session().get(url, **kwargs)
+
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, requests.HTTPError):
+        return error.response is not None and error.response.status_code in RETRY_STATUSES
+    return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+
+def _guarded_with_retries(upstream: str, fetch: Callable[[], Any]) -> Any:
+    """
+    Call `fetch` under `upstream`'s breaker, retrying transient HTTP failures up to
+    HTTP_RETRIES times with exponential backoff. Each attempt is its own guarded call,
+    so the breaker sees every failure and an open breaker ends the retries. Retry-After
+    is not honoured: a waiting request would hold a web worker thread.
+    """
+    for attempt in range(config.HTTP_RETRIES + 1):
+        try:
+            return resilience.guarded(upstream, fetch)
+        except Exception as e:
+            if attempt == config.HTTP_RETRIES or not _is_retryable(e):
+                raise
+        time.sleep(config.HTTP_BACKOFF_SECS * 2 ** attempt)
+
+
+# Keys with a background refresh already running
+_refreshing: set = set()
+_refreshing_lock = threading.Lock()
+_staleness = threading.local()
+
+
+class StalenessTracker:
+    """Collects the age of the oldest stale value served inside track_staleness()."""
+
+    def __init__(self):
+        self.max_age: Optional[float] = None
+
+    def note(self, age: float) -> None:
+        if self.max_age is None or age > self.max_age:
+            self.max_age = age
+
+
+@contextmanager
+def track_staleness():
+    """Track stale-while-revalidate hits served to the current thread."""
+    tracker = StalenessTracker()
+    previous = getattr(_staleness, "tracker", None)
+    _staleness.tracker = tracker
+    try:
+        yield tracker
+    finally:
+        _staleness.tracker = previous
+
+
+def _cache_put(key: str, value: Any, fresh_ttl: Optional[float] = None) -> None:
+    """
+    Cache a freshly fetched value. It is served as fresh for `fresh_ttl` (default the
+    soft TTL) and kept until the hard TTL, to be served stale in stale-while-revalidate
+    mode or while its upstream is failing.
+    """
+    now = time.time()
+    soft = config.CACHE_SOFT_TTL_SECS if fresh_ttl is None else fresh_ttl
+    hard = max(soft, config.CACHE_HARD_TTL_SECS)
+    cache.set(key, (now, now + soft, value), ttl=hard)
+
+
+def _cache_peek(key: str, upstream: str) -> Tuple[Any, Optional[float]]:
+    """
+    (value, stale_age) for `key`, or (None, None); stale_age is None for a fresh value.
+    A value past its soft TTL is still returned (in SWR mode, or while `upstream`'s
+    breaker is open). No side effects: the caller records the age of what it serves
+    (_note_stale) and starts the refresh.
+    """
+    entry = cache.get(key)
+    if entry is None:
+        return None, None
+    fetched_at, fresh_until, value = entry
+    now = time.time()
+    if now < fresh_until:
+        return value, None
+    if not (config.CACHE_SWR or resilience.is_failing(upstream)):
+        return None, None
+    return value, now - fetched_at
+
+
+def _note_stale(age: float) -> None:
+    """Record that a value `age` seconds old was served to the current thread."""
+    tracker = getattr(_staleness, "tracker", None)
+    if tracker is not None:
+        tracker.note(age)
+
+
+def _cache_lookup(key: str, refresh: Callable[[], Any], upstream: str):
+    """
+    Return the cached value for `key` or None; a stale value (see _cache_peek) has its
+    age recorded and starts one background refresh.
+    """
+    value, stale_age = _cache_peek(key, upstream)
+    if stale_age is not None:
+        _note_stale(stale_age)
+        _refresh_in_background(key, refresh)
+    return value
+
 
+def _claim_refresh(keys: List[str]) -> List[str]:
+    """The keys without a background refresh running, now marked as refreshing."""
+    with _refreshing_lock:
+        claimed = [key for key in keys if key not in _refreshing]
+        _refreshing.update(claimed)
+    return claimed
+
+
+def _start_refresh(name: str, keys: List[str], refresh: Callable[[], Any]) -> None:
+    def run():
+        try:
+            flight.do(name, refresh)
+        except Exception:
+            pass
+        finally:
+            with _refreshing_lock:
+                _refreshing.difference_update(keys)
+
+    threading.Thread(target=run, name=f"refresh-{name}", daemon=True).start()
+
+
+def _refresh_in_background(key: str, refresh: Callable[[], Any]) -> None:
+    if _claim_refresh([key]):
+        _start_refresh(key, [key], refresh)
+
+
+def is_known_unknown(ticker: str) -> bool:
+    """True for symbols missing from the listing index or recently answered with no data."""
+    return not symbols.is_listed(ticker) or cache.get(f"neg:{ticker}") is not None
+
+
+def _remember_unknown(ticker: str) -> None:
+    """
+    Briefly remember a symbol yfinance had no data for. An empty answer may also be a
+    swallowed timeout or 5xx, so listed symbols are never remembered as unknown.
+    """
+    if symbols.LISTED is not None and ticker.upper() in symbols.LISTED:
+        return
+    cache.set(f"neg:{ticker}", True, ttl=config.NEGATIVE_TTL_SECS)
 
-cache = TTLCache(ttl_seconds=60)
 
 def get_stock_price(ticker: str) -> float | None:
     try:
@@ -53,73 +227,254 @@ def get_price_details(ticker: str) -> Optional[Tuple[float, Optional[str], Optio
     Return (price, currency, change_percent_today) or None on failure.
     """
     try:
-        cached = cache.get(f"price:{ticker}")
+        cached = _cache_lookup(f"price:{ticker}", lambda: _fetch_price_details(ticker), "yahoo")
         if cached is not None:
             return cached
-        stock = yf.Ticker(ticker)
-        info = stock.fast_info if hasattr(stock, "fast_info") else {}
-        price = None
-        currency = None
-        change_percent = None
+        if is_known_unknown(ticker):
+            return None
+        return flight.do(f"price:{ticker}", lambda: _fetch_price_details(ticker))
+    except Exception:
+        return None
+
+
+def _encode_quote(quote: Tuple[float, Optional[str], Optional[float]]) -> str:
+    return json.dumps(list(quote))
 
-        # Current price
+
+def _decode_quote(text: str) -> Tuple[float, Optional[str], Optional[float]]:
+    price, currency, change_percent = json.loads(text)
+    return (price, currency, change_percent)
+
+
+def _fetch_price_details(ticker: str) -> Optional[Tuple[float, Optional[str], Optional[float]]]:
+    try:
+        result = replay.upstream(
+            "price", ticker, lambda: _quote_from_yahoo(ticker),
+            encode=_encode_quote, decode=_decode_quote, ext="json",
+        )
+        if result is None:
+            # The upstream answered but has nothing for this symbol
+            _remember_unknown(ticker)
+            return None
+        _cache_put(f"price:{ticker}", result, market_hours.quote_ttl(ticker, time.time()))
+        return result
+    except Exception:
+        return None
+
+
+def _quote_from_yahoo(ticker: str) -> Optional[Tuple[float, Optional[str], Optional[float]]]:
+    return resilience.guarded("yahoo", lambda: _read_yahoo_quote(ticker))
+
+
+def _read_yahoo_quote(ticker: str) -> Optional[Tuple[float, Optional[str], Optional[float]]]:
+    """Quote from yf.Ticker fast_info; upstream errors propagate to the breaker."""
+    stock = yf.Ticker(ticker)
+    info = stock.fast_info if hasattr(stock, "fast_info") else {}
+    price = None
+    currency = None
+    change_percent = None
+
+    # Current price
+    fast_error = None
+    try:
+        last_price = info["last_price"] if "last_price" in info else None
+        price = float(last_price) if last_price is not None else None
+    except Exception as e:
+        # Throttling or a timeout: re-raised for the breaker unless the fallback has a price
+        fast_error = e
+
+    # Fallback via history
+    if price is None:
         try:
-            price = float(info["last_price"]) if "last_price" in info else None
+            hist = stock.history(period="1d")
         except Exception:
-            price = None
+            if fast_error is not None:
+                raise fast_error
+            raise
+        if not hist.empty:
+            price = float(hist['Close'].iloc[-1])
 
-        # Fallback via history
-        if price is None:
-            hist = stock.history(period="1d")
-            if not hist.empty:
-                price = float(hist['Close'].iloc[-1])
+    # Currency
+    try:
+        currency = info.get("currency")
+    except Exception:
+        currency = None
+
+    # Percent change today
+    try:
+        prev_close = float(info["previous_close"]) if "previous_close" in info else None
+        if prev_close and price is not None and prev_close != 0:
+            change_percent = (price - prev_close) / prev_close * 100.0
+    except Exception:
+        change_percent = None
 
-        # Currency
+    if price is None:
+        if fast_error is not None:
+            raise fast_error
+        return None
+    return (price, currency, change_percent)
+
+
+def _closes_for(frame, ticker: str, multi: bool):
+    """Pick the Close column for `ticker` out of a yf.download frame."""
+    try:
+        if multi:
+            if ticker not in frame.columns.get_level_values(0):
+                return None
+            return frame[ticker]["Close"].dropna()
+        return frame["Close"].dropna()
+    except Exception:
+        return None
+
+
+def get_price_details_many(tickers: List[str]) -> Dict[str, Optional[Tuple[float, Optional[str], Optional[float]]]]:
+    """
+    Batched get_price_details: {ticker: (price, currency, change_percent_today) or None}.
+    Cache misses are fetched together with a single yf.download call, and stale
+    entries are refreshed together with another one in the background.
+    """
+    results: Dict[str, Optional[Tuple[float, Optional[str], Optional[float]]]] = {}
+    misses: List[str] = []
+    stale: List[str] = []
+    for ticker in tickers:
+        # A fresh full single-ticker quote if there is one, else the newer of the two
+        cached, stale_age = _cache_peek(f"price:{ticker}", "yahoo")
+        if cached is None or stale_age is not None:
+            batch, batch_age = _cache_peek(f"bulkprice:{ticker}", "yahoo")
+            if batch is not None and (cached is None or batch_age is None or batch_age < stale_age):
+                cached, stale_age = batch, batch_age
+        if cached is not None:
+            results[ticker] = cached
+            if stale_age is not None:
+                _note_stale(stale_age)
+                if ticker not in stale:
+                    stale.append(ticker)
+        elif is_known_unknown(ticker):
+            results[ticker] = None
+        elif ticker not in misses:
+            misses.append(ticker)
+
+    # Stale quotes are refreshed together in one background batch
+    claimed = _claim_refresh([f"bulkprice:{ticker}" for ticker in stale])
+    if claimed:
+        refresh = [key.split(":", 1)[1] for key in claimed]
+        _start_refresh("price-batch:" + ",".join(sorted(refresh)), claimed, lambda: _fetch_price_details_many(refresh))
+
+    if len(misses) == 1:
+        # Nothing to batch; the single-ticker path also knows the currency
+        results[misses[0]] = get_price_details(misses[0])
+        misses = []
+
+    if misses:
+        batch_key = "price-batch:" + ",".join(sorted(misses))
         try:
-            currency = info.get("currency")
+            results.update(flight.do(batch_key, lambda: _fetch_price_details_many(misses)))
         except Exception:
-            currency = None
+            pass
+
+    return {ticker: results.get(ticker) for ticker in tickers}
+
 
-        # Percent change today
+def _fetch_price_details_many(misses: List[str]) -> Dict[str, Optional[Tuple[float, Optional[str], Optional[float]]]]:
+    if replay.mode() == "replay":
+        fetched = {ticker: _replayed_quote(ticker, latency=(i == 0)) for i, ticker in enumerate(misses)}
+    else:
+        fetched = _quotes_from_yahoo_download(misses)
+        if replay.mode() == "record":
+            for ticker, result in fetched.items():
+                if result is not None:
+                    replay.save_text("bulkprice", ticker, _encode_quote(result), "json")
+    for ticker, result in fetched.items():
+        if result is not None:
+            # Not under price:{ticker}: batch quotes have no currency and a close-to-close change
+            _cache_put(f"bulkprice:{ticker}", result, market_hours.quote_ttl(ticker, time.time()))
+    return fetched
+
+
+def _replayed_quote(ticker: str, latency: bool = True) -> Optional[Tuple[float, Optional[str], Optional[float]]]:
+    """A recorded batch quote, else a recorded single-ticker one."""
+    for kind in ("bulkprice", "price"):
         try:
-            prev_close = float(info["previous_close"]) if "previous_close" in info else None
-            if prev_close and price is not None and prev_close != 0:
-                change_percent = (price - prev_close) / prev_close * 100.0
+            return _decode_quote(replay.load_text(kind, ticker, "json", latency=latency))
         except Exception:
-            change_percent = None
+            latency = False
+    return None
 
-        if price is None:
-            return None
-        result = (price, currency, change_percent)
-        cache.set(f"price:{ticker}", result)
-        return result
+
+def _quotes_from_yahoo_download(misses: List[str]) -> Dict[str, Optional[Tuple[float, Optional[str], Optional[float]]]]:
+    """
+    One yf.download call for all `misses`: {ticker: (price, None, change_percent) or None}.
+    Symbols the download had no data for go through get_price_details, which tells an
+    unknown symbol from a failed fetch and negatively caches the former.
+    """
+    fetched: Dict[str, Optional[Tuple[float, Optional[str], Optional[float]]]] = {}
+    try:
+        frame = resilience.guarded("yahoo", lambda: yf.download(
+            misses,
+            period="5d",
+            interval="1d",
+            group_by="ticker",
+            progress=False,
+            threads=True,
+        ))
     except Exception:
-        return None
+        # Failed, or the breaker is open: no per-symbol calls either
+        return {ticker: None for ticker in misses}
+    multi = frame is not None and getattr(frame.columns, "nlevels", 1) > 1
+    for ticker in misses:
+        closes = _closes_for(frame, ticker, multi) if frame is not None and not frame.empty else None
+        if closes is None or closes.empty:
+            fetched[ticker] = get_price_details(ticker)
+            continue
+        price = float(closes.iloc[-1])
+        change_percent = None
+        if len(closes) > 1:
+            prev_close = float(closes.iloc[-2])
+            if prev_close != 0:
+                change_percent = (price - prev_close) / prev_close * 100.0
+        # yf.download does not report currency; format_price_response defaults it for compare
+        fetched[ticker] = (price, None, change_percent)
+    return fetched
+
 
 def get_finance_news(query: str | None = None) -> List[str]:
     search_term = query or config.NEWS_QUERY
-    cached = cache.get(f"news:{search_term}")
+    cached = _cache_lookup(f"news:{search_term}", lambda: _fetch_finance_news(search_term), "google_news")
     if cached is not None:
         return cached
-    url = f"https://news.google.com/search?q={search_term}"
     try:
-        response = requests.get(
-            url,
-            headers={"User-Agent": config.USER_AGENT},
-            timeout=config.REQUEST_TIMEOUT_SECS,
-        )
+        return flight.do(f"news:{search_term}", lambda: _fetch_finance_news(search_term))
+    except Exception:
+        return []
+
+
+def _download_news_html(search_term: str) -> str:
+    def fetch() -> str:
+        response = http_get("https://news.google.com/search", params={"q": search_term})
         response.raise_for_status()
+        return response.text
+
+    return _guarded_with_retries("google_news", fetch)
+
+
+def _fetch_finance_news(search_term: str) -> List[str]:
+    try:
+        html = replay.upstream(
+            "news", search_term, lambda: _download_news_html(search_term),
+            encode=str, decode=str, ext="html",
+        )
     except Exception:
         return []
 
     try:
-        soup = BeautifulSoup(response.text, 'html.parser')
-        # Class names change; fallback to headlines via <h3> tags as well
-        anchors = soup.find_all("a", {"class": "JtKRv"})
-        headlines = [a.get_text(strip=True) for a in anchors if a.get_text(strip=True)]
+        headlines: List[str] = []
+        if config.NEWS_FAST_PARSE:
+            try:
+                headlines = extract_headlines_fast(html)
+            except Exception:
+                headlines = []
         if not headlines:
-            h3s = soup.find_all("h3")
-            headlines = [h.get_text(strip=True) for h in h3s if h.get_text(strip=True)]
+            headlines = extract_headlines_full(html)
         # Deduplicate and limit
         unique = []
         seen = set()
@@ -128,34 +483,148 @@ def get_finance_news(query: str | None = None) -> List[str]:
                 seen.add(h)
                 unique.append(h)
         result = unique[:5]
-        cache.set(f"news:{search_term}", result)
+        _cache_put(f"news:{search_term}", result)
         return result
     except Exception:
         return []
 
 
+def extract_headlines_full(html: str) -> List[str]:
+    """Headline texts from a Google News results page, via a full parse tree."""
+    soup = BeautifulSoup(html, 'html.parser')
+    # Class names change; fallback to headlines via <h3> tags as well
+    anchors = soup.find_all("a", {"class": "JtKRv"})
+    headlines = [a.get_text(strip=True) for a in anchors if a.get_text(strip=True)]
+    if not headlines:
+        h3s = soup.find_all("h3")
+        headlines = [h.get_text(strip=True) for h in h3s if h.get_text(strip=True)]
+    return headlines
+
+
+_HEADLINE_ANCHORS = SoupStrainer("a", attrs={"class": "JtKRv"})
+_HEADLINE_H3 = SoupStrainer("h3")
+
+
+def extract_headlines_fast(html: str) -> List[str]:
+    """
+    Same result as extract_headlines_full, but only headline nodes are built into the
+    tree (and lxml is used when installed), so the rest of the page is just tokenized.
+    """
+    soup = BeautifulSoup(html, FAST_HTML_PARSER, parse_only=_HEADLINE_ANCHORS)
+    headlines = [a.get_text(strip=True) for a in soup.find_all("a")]
+    headlines = [h for h in headlines if h]
+    if not headlines:
+        soup = BeautifulSoup(html, FAST_HTML_PARSER, parse_only=_HEADLINE_H3)
+        headlines = [h.get_text(strip=True) for h in soup.find_all("h3")]
+        headlines = [h for h in headlines if h]
+    return headlines
+
+
 def get_history_series(ticker: str, days: int = 5):
     """
     Return pandas Series of close prices for last `days` market days, or None.
+    One series per ticker is cached, covering the widest window asked for so far;
+    shorter windows are slices of it.
     """
     try:
-        cached = cache.get(f"hist:{ticker}:{days}")
+        cached = _cache_lookup(f"hist:{ticker}", lambda: _fetch_history_series(ticker, days), "yahoo")
         if cached is not None:
-            return cached
-        stock = yf.Ticker(ticker)
-        hist = stock.history(period=f"{max(days*2, 7)}d")  # fetch extra to be safe
-        if hist.empty or 'Close' not in hist:
+            window, close = cached
+            if window >= days:
+                return close.tail(days)
+        elif is_known_unknown(ticker):
             return None
-        # Take last `days` rows
-        close = hist['Close'].dropna().tail(days)
+        # Extend the canonical series upstream only for a longer window
+        window = max(days, cached[0]) if cached is not None else days
+        close = flight.do(f"hist:{ticker}:{window}", lambda: _fetch_history_series(ticker, window))
+        return close.tail(days) if close is not None else None
+    except Exception:
+        return None
+
+
+def _download_history(ticker: str, period: Optional[str] = None, start: Optional[str] = None):
+    """Daily bars from Yahoo, either for a period ('30d') or since a start date."""
+    if replay.mode() == "replay":
+        return replay.slice_frame(replay.load_frame("history", ticker), period=period, start=start)
+    stock = yf.Ticker(ticker)
+    if start:
+        frame = resilience.guarded("yahoo", lambda: stock.history(start=start, interval="1d"))
+    else:
+        frame = resilience.guarded("yahoo", lambda: stock.history(period=period, interval="1d"))
+    if replay.mode() == "record" and not frame.empty:
+        replay.save_frame("history", ticker, frame)
+    return frame
+
+
+def _make_history_store() -> Optional[HistoryStore]:
+    if not config.HISTORY_STORE:
+        return None
+    try:
+        return HistoryStore(
+            config.HISTORY_DIR,
+            fetch=_download_history,
+            backfill_days=config.HISTORY_BACKFILL_DAYS,
+            retry_seconds=config.HISTORY_RETRY_SECS,
+        )
+    except Exception:
+        return None
+
+
+history_store = _make_history_store()
+
+render_pool = (
+    chart_render.RenderPool(config.CHART_POOL_WORKERS, config.CHART_POOL_MAX_PENDING, config.CHART_RENDER_TIMEOUT_SECS)
+    if config.CHART_POOL_WORKERS > 0 else None
+)
+
+
+def _fetch_history_series(ticker: str, days: int):
+    """Fetch and cache the canonical series: at least `days`, never narrower than cached."""
+    try:
+        current = cache.get(f"hist:{ticker}")
+        if current is not None:
+            _, _, (cached_days, _) = current
+            days = max(days, cached_days)
+        close = None
+        if history_store is not None:
+            try:
+                close = history_store.closes(ticker, days)
+            except Exception:
+                close = None
+        if close is None:
+            hist = _download_history(ticker, period=f"{max(days*2, 7)}d")  # fetch extra to be safe
+            if hist.empty or 'Close' not in hist:
+                return None
+            # Take last `days` rows
+            close = hist['Close'].dropna().tail(days)
         if close.empty:
             return None
-        cache.set(f"hist:{ticker}:{days}", close)
+        _cache_put(f"hist:{ticker}", (days, close), market_hours.history_ttl(ticker, time.time()))
         return close
     except Exception:
         return None
 
 
+def render_history_png(ticker: str, series) -> Optional[bytes]:
+    """
+    PNG line chart of a close series, or None on failure. Raises chart_render.RenderBusy
+    when the render pool is full or the render timed out.
+    """
+    dates = series.index.values
+    closes = series.to_numpy(dtype="f8")
+    if render_pool is not None:
+        return render_pool.render(ticker, dates, closes)
+    if config.CHART_RENDERER == "fast":
+        try:
+            return chart_render.render_png(ticker, dates, closes)
+        except Exception:
+            pass
+    try:
+        return chart_render.render_png_pyplot(ticker, dates, closes)
+    except Exception:
+        return None
+
+
 def generate_history_chart_base64(ticker: str, days: int = 5) -> Optional[str]:
     """
     Generate a small line chart for the last `days` closes and return base64 PNG string.
@@ -164,16 +633,7 @@ def generate_history_chart_base64(ticker: str, days: int = 5) -> Optional[str]:
     if series is None:
         return None
     try:
-        fig, ax = plt.subplots(figsize=(4, 2.2), dpi=150)
-        ax.plot(series.index, series.values, marker='o', linewidth=1.5)
-        ax.set_title(f"{ticker} - Last {len(series)} days")
-        ax.grid(True, linestyle='--', alpha=0.3)
-        ax.tick_params(axis='x', labelrotation=45)
-        fig.tight_layout()
-        buf = io.BytesIO()
-        fig.savefig(buf, format='png')
-        plt.close(fig)
-        buf.seek(0)
-        return base64.b64encode(buf.read()).decode('ascii')
-    except Exception:
+        png = render_history_png(ticker, series)
+    except chart_render.RenderBusy:
         return None
+    return base64.b64encode(png).decode('ascii') if png is not None else None
@@ -0,0 +1,161 @@
+# Incremental on-disk store of daily OHLCV bars, one .npy file per ticker
+import json
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from . import market_hours
+
+BAR_DTYPE = np.dtype([
+    ("ts", "i8"),  # bar date, epoch seconds at 00:00 UTC
+    ("open", "f8"),
+    ("high", "f8"),
+    ("low", "f8"),
+    ("close", "f8"),
+    ("volume", "f8"),
+])
+
+# fetch(ticker, period=...) or fetch(ticker, start="YYYY-MM-DD") -> yfinance-style DataFrame
+FetchFn = Callable[..., Optional[pd.DataFrame]]
+
+
+def frame_to_bars(frame: pd.DataFrame) -> np.ndarray:
+    """Convert a yfinance history frame into a BAR_DTYPE array (NaN closes dropped)."""
+    frame = frame.dropna(subset=["Close"])
+    index = pd.DatetimeIndex(frame.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    dates = index.normalize().values.astype("datetime64[s]").astype("i8")
+    bars = np.empty(len(frame), dtype=BAR_DTYPE)
+    bars["ts"] = dates
+    for field, column in (("open", "Open"), ("high", "High"), ("low", "Low"), ("close", "Close"), ("volume", "Volume")):
+        bars[field] = frame[column].to_numpy(dtype="f8") if column in frame else np.nan
+    return bars
+
+
+class HistoryStore:
+    """
+    Daily bars per ticker under `root`. Only bars since the last stored date are
+    fetched, and only once a new bar can exist (market_hours.history_ttl); any
+    window of stored bars is then served from a memory-mapped file.
+    """
+
+    def __init__(self, root: str, fetch: FetchFn, backfill_days: int = 260, retry_seconds: float = 60.0):
+        self.root = root
+        self.fetch = fetch
+        self.backfill_days = backfill_days
+        # After a failed or empty fetch, stored bars are served without going upstream for this long
+        self.retry_seconds = retry_seconds
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _lock(self, ticker: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(ticker, threading.Lock())
+
+    def _path(self, ticker: str, suffix: str) -> str:
+        safe = re.sub(r"[^A-Za-z0-9._-]", "_", ticker.upper())
+        return os.path.join(self.root, safe + suffix)
+
+    def load(self, ticker: str) -> Optional[np.ndarray]:
+        path = self._path(ticker, ".npy")
+        if not os.path.exists(path):
+            return None
+        return np.load(path, mmap_mode="r")
+
+    def _meta(self, ticker: str) -> dict:
+        try:
+            with open(self._path(ticker, ".json"), encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def _write(self, ticker: str, bars: np.ndarray, meta: dict) -> None:
+        path = self._path(ticker, ".npy")
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, bars)
+        os.replace(tmp, path)
+        self._write_meta(ticker, meta)
+
+    def _write_meta(self, ticker: str, meta: dict) -> None:
+        meta_path = self._path(ticker, ".json")
+        with open(f"{meta_path}.{os.getpid()}.tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(f"{meta_path}.{os.getpid()}.tmp", meta_path)
+
+    def _fetch(self, ticker: str, **kwargs) -> Optional[pd.DataFrame]:
+        """The fetch's frame, or None if it failed or has no closes."""
+        try:
+            frame = self.fetch(ticker, **kwargs)
+        except Exception:
+            return None
+        if frame is None or frame.empty or "Close" not in frame:
+            return None
+        return frame
+
+    def _back_off(self, ticker: str, meta: dict, now: float) -> None:
+        meta["retry_at"] = now + self.retry_seconds
+        try:
+            self._write_meta(ticker, meta)
+        except Exception:
+            pass
+
+    def sync(self, ticker: str, min_bars: int = 0) -> Optional[np.ndarray]:
+        """
+        Bring the stored bars up to date and make sure at least `min_bars` are kept
+        (as far as the ticker's listing allows). Returns the stored bars; if the
+        upstream fails, the bars already stored.
+        """
+        with self._lock(ticker):
+            bars = self.load(ticker)
+            meta = self._meta(ticker)
+            now = time.time()
+            stored = 0 if bars is None else len(bars)
+            if now < meta.get("retry_at", 0.0):
+                return bars
+
+            if stored < min_bars and meta.get("backfilled_bars", 0) < min_bars:
+                # Not enough history yet: one wide fetch replaces the file
+                want = max(min_bars, self.backfill_days)
+                frame = self._fetch(ticker, period=f"{int(want * 1.5) + 7}d")
+                if frame is None:
+                    self._back_off(ticker, meta, now)
+                    return bars
+                bars = frame_to_bars(frame)
+                self._write(ticker, bars, {"synced_at": now, "backfilled_bars": want})
+                return self.load(ticker)
+
+            synced_at = meta.get("synced_at", 0.0)
+            if bars is not None and now < synced_at + market_hours.history_ttl(ticker, synced_at):
+                return bars
+
+            # Refetch from the last stored bar (inclusive): it may have been partial
+            last_day = pd.Timestamp(int(bars["ts"][-1]), unit="s").strftime("%Y-%m-%d") if stored else None
+            frame = self._fetch(ticker, start=last_day) if last_day else self._fetch(ticker, period=f"{self.backfill_days}d")
+            if frame is None:
+                self._back_off(ticker, meta, now)
+                return bars
+            fresh = frame_to_bars(frame)
+            if stored:
+                keep = np.asarray(bars[bars["ts"] < fresh["ts"][0]]) if len(fresh) else np.asarray(bars)
+                fresh = np.concatenate([keep, fresh])
+            meta["synced_at"] = now
+            meta.pop("retry_at", None)
+            self._write(ticker, fresh, meta)
+            return self.load(ticker)
+
+    def closes(self, ticker: str, days: int) -> Optional[pd.Series]:
+        """Close prices of the last `days` stored bars, syncing first if a bar is due."""
+        bars = self.sync(ticker, min_bars=days)
+        if bars is None or len(bars) == 0:
+            return None
+        tail = bars[-days:]
+        index = pd.DatetimeIndex(np.asarray(tail["ts"]).astype("datetime64[s]"), name="Date")
+        return pd.Series(np.array(tail["close"]), index=index, name="Close")
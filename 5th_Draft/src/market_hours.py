@@ -0,0 +1,117 @@
+# Exchange session calendar and cache TTL policy for market data
+import bisect
+from datetime import date, datetime, time as dtime, timedelta, timezone
+from typing import List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from . import config
+
+NY = ZoneInfo("America/New_York")
+REGULAR_OPEN = dtime(9, 30)
+REGULAR_CLOSE = dtime(16, 0)
+EARLY_CLOSE = dtime(13, 0)
+
+# NYSE full-day holidays
+US_HOLIDAYS = {
+    date(2025, 1, 1), date(2025, 1, 9), date(2025, 1, 20), date(2025, 2, 17),
+    date(2025, 4, 18), date(2025, 5, 26), date(2025, 6, 19), date(2025, 7, 4),
+    date(2025, 9, 1), date(2025, 11, 27), date(2025, 12, 25),
+    date(2026, 1, 1), date(2026, 1, 19), date(2026, 2, 16), date(2026, 4, 3),
+    date(2026, 5, 25), date(2026, 6, 19), date(2026, 7, 3), date(2026, 9, 7),
+    date(2026, 11, 26), date(2026, 12, 25),
+    date(2027, 1, 1), date(2027, 1, 18), date(2027, 2, 15), date(2027, 3, 26),
+    date(2027, 5, 31), date(2027, 6, 18), date(2027, 7, 5), date(2027, 9, 6),
+    date(2027, 11, 25), date(2027, 12, 24),
+}
+
+# NYSE 1 p.m. early closes
+US_EARLY_CLOSES = {
+    date(2025, 7, 3), date(2025, 11, 28), date(2025, 12, 24),
+    date(2026, 11, 27), date(2026, 12, 24),
+    date(2027, 11, 26),
+}
+
+# Closing prints keep arriving for a few minutes after the bell
+CLOSE_SETTLE_SECS = 15 * 60
+
+CALENDAR_START = date(2025, 1, 1)
+# Beyond the holiday table only the weekday rule applies
+CALENDAR_DAYS = 365 * 5
+
+
+def _build_sessions() -> Tuple[List[float], List[float]]:
+    """Precompute (open, close) epoch seconds for every US trading day."""
+    opens: List[float] = []
+    closes: List[float] = []
+    for offset in range(CALENDAR_DAYS):
+        day = CALENDAR_START + timedelta(days=offset)
+        if day.weekday() >= 5 or day in US_HOLIDAYS:
+            continue
+        close = EARLY_CLOSE if day in US_EARLY_CLOSES else REGULAR_CLOSE
+        opens.append(datetime.combine(day, REGULAR_OPEN, NY).timestamp())
+        closes.append(datetime.combine(day, close, NY).timestamp())
+    return opens, closes
+
+
+_OPENS, _CLOSES = _build_sessions()
+
+
+def symbol_class(symbol: str) -> str:
+    """'crypto' (trades 24/7), 'us' (NYSE/Nasdaq session) or 'other' (unknown calendar)."""
+    symbol = symbol.upper()
+    if symbol.endswith("-USD"):
+        return "crypto"
+    if "." in symbol or "=" in symbol:
+        # Exchange-suffixed listings (RELIANCE.NS) and FX pairs (EURUSD=X)
+        return "other"
+    return "us"
+
+
+def is_us_session_open(ts: float, grace: float = 0.0) -> bool:
+    idx = bisect.bisect_right(_OPENS, ts) - 1
+    return idx >= 0 and ts < _CLOSES[idx] + grace
+
+
+def seconds_until_us_open(ts: float) -> Optional[float]:
+    """Seconds until the next regular session opens, or None past the calendar."""
+    idx = bisect.bisect_right(_OPENS, ts)
+    if idx >= len(_OPENS):
+        return None
+    return _OPENS[idx] - ts
+
+
+def _seconds_until_utc_midnight(ts: float) -> float:
+    now = datetime.fromtimestamp(ts, timezone.utc)
+    midnight = datetime.combine(now.date() + timedelta(days=1), dtime(0, 0), timezone.utc)
+    return midnight.timestamp() - ts
+
+
+def quote_ttl(symbol: str, ts: float) -> float:
+    """
+    Freshness TTL for a quote fetched at `ts`: short while the symbol's market trades,
+    otherwise until the next session opens.
+    """
+    live = config.QUOTE_TTL_OPEN_SECS
+    kind = symbol_class(symbol)
+    if not config.MARKET_HOURS_TTL or kind != "us" or is_us_session_open(ts, CLOSE_SETTLE_SECS):
+        return live
+    until_open = seconds_until_us_open(ts)
+    return max(live, until_open) if until_open is not None else live
+
+
+def history_ttl(symbol: str, ts: float) -> float:
+    """
+    Freshness TTL for daily bars fetched at `ts`: today's bar changes while the market
+    trades; otherwise the bars stay valid until the next bar is due.
+    """
+    live = config.HISTORY_TTL_OPEN_SECS
+    if not config.MARKET_HOURS_TTL:
+        return live
+    kind = symbol_class(symbol)
+    if kind == "crypto":
+        # A new daily bar starts at 00:00 UTC
+        return min(live, _seconds_until_utc_midnight(ts))
+    if kind != "us" or is_us_session_open(ts, CLOSE_SETTLE_SECS):
+        return live
+    until_open = seconds_until_us_open(ts)
+    return max(live, until_open) if until_open is not None else live
@@ -0,0 +1,132 @@
+# Shared quote poller that fans updates out to streaming clients
+import os
+import queue
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+Quote = Optional[Tuple[float, Optional[str], Optional[float]]]
+# source(symbols) -> {symbol: (price, currency, change_percent) or None}
+QuoteSource = Callable[[List[str]], Dict[str, Quote]]
+
+
+class FakeQuoteSource:
+    """Deterministic random-walk quotes for tests and offline demos."""
+
+    def __init__(self, seed: int = 0):
+        self._rng = random.Random(seed)
+        self._prices: Dict[str, Tuple[float, float]] = {}  # symbol -> (open, last)
+        self.calls = 0
+
+    def __call__(self, symbols: List[str]) -> Dict[str, Quote]:
+        self.calls += 1
+        quotes: Dict[str, Quote] = {}
+        for symbol in symbols:
+            open_price, last = self._prices.get(symbol) or (100.0 + self._rng.random() * 100,) * 2
+            last = round(last * (1 + self._rng.gauss(0, 0.002)), 4)
+            self._prices[symbol] = (open_price, last)
+            quotes[symbol] = (last, "USD", (last - open_price) / open_price * 100.0)
+        return quotes
+
+
+class Subscription:
+    def __init__(self, symbols: List[str], max_pending: int):
+        self.symbols: Set[str] = set(symbols)
+        self.queue: "queue.Queue[dict]" = queue.Queue(maxsize=max_pending)
+
+    def offer(self, update: dict) -> None:
+        """Queue an update; a slow client loses its oldest pending update, never blocks the poller."""
+        while True:
+            try:
+                self.queue.put_nowait(update)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+
+class QuoteHub:
+    """
+    One background poller per worker. Each tick it fetches the union of all subscribed
+    symbols with a single source call and pushes each client the symbols it asked for,
+    so upstream load depends on distinct symbols, not on the number of clients.
+    """
+
+    def __init__(self, source: QuoteSource, interval_seconds: float = 5.0, max_pending: int = 10):
+        self.source = source
+        self.interval = interval_seconds
+        self.max_pending = max_pending
+        self.polls = 0
+        self.errors = 0
+        self._subs: List[Subscription] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._poller: Optional[threading.Thread] = None
+        self._poller_pid: Optional[int] = None
+
+    def subscribe(self, symbols: List[str]) -> Subscription:
+        sub = Subscription(symbols, self.max_pending)
+        with self._lock:
+            self._subs.append(sub)
+            if self._poller is None or self._poller_pid != os.getpid() or not self._poller.is_alive():
+                self._poller = threading.Thread(target=self._run, name="quote-poller", daemon=True)
+                self._poller_pid = os.getpid()
+                self._poller.start()
+        self._wakeup.set()
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            if sub in self._subs:
+                self._subs.remove(sub)
+
+    def poll_once(self) -> int:
+        """
+        Fetch all subscribed symbols once and fan out; returns the number of symbols
+        polled (0: no subscribers). A failing source raises.
+        """
+        with self._lock:
+            subs = list(self._subs)
+        symbols = sorted(set().union(*(s.symbols for s in subs))) if subs else []
+        if not symbols:
+            return 0
+        try:
+            quotes = self.source(symbols)
+        except Exception:
+            self.errors += 1
+            raise
+        self.polls += 1
+        ts = time.time()
+        payload = {
+            symbol: (None if quote is None else {"price": quote[0], "currency": quote[1], "change_pct": quote[2]})
+            for symbol, quote in quotes.items()
+        }
+        for sub in subs:
+            sub.offer({"ts": ts, "quotes": {s: payload.get(s) for s in sorted(sub.symbols)}})
+        return len(symbols)
+
+    def _run(self) -> None:
+        while True:
+            try:
+                polled = self.poll_once()
+            except Exception:
+                # Clients are still connected: try again next tick
+                polled = -1
+            if polled == 0:
+                # Idle until someone subscribes
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            time.sleep(self.interval)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "clients": len(self._subs),
+                "symbols": len(set().union(*(s.symbols for s in self._subs))) if self._subs else 0,
+                "polls": self.polls,
+                "errors": self.errors,
+            }
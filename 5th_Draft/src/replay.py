@@ -0,0 +1,109 @@
+# Record/replay of upstream responses for offline benchmarks and load tests
+import io
+import os
+import re
+import time
+from typing import Callable, Optional, TypeVar
+
+from . import config
+
+T = TypeVar("T")
+
+
+class FixtureMissing(LookupError):
+    """Replay mode was asked for a response that was never recorded."""
+
+
+def mode() -> str:
+    """live | record | replay"""
+    return (config.FETCH_MODE or "live").lower()
+
+
+def _path(kind: str, key: str, ext: str) -> str:
+    safe = re.sub(r"[^A-Za-z0-9._-]", "_", key)
+    return os.path.join(config.FIXTURES_DIR, kind, f"{safe}.{ext}")
+
+
+def _inject_latency() -> None:
+    if config.REPLAY_LATENCY_MS > 0:
+        time.sleep(config.REPLAY_LATENCY_MS / 1000.0)
+
+
+def save_text(kind: str, key: str, text: str, ext: str = "txt") -> None:
+    path = _path(kind, key, ext)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def load_text(kind: str, key: str, ext: str = "txt", latency: bool = True) -> str:
+    """Recorded response for (kind, key), after the configured replay latency."""
+    if latency:
+        _inject_latency()
+    try:
+        with open(_path(kind, key, ext), encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        raise FixtureMissing(f"No recorded {kind} response for {key}")
+
+
+def upstream(
+    kind: str,
+    key: str,
+    fetch: Callable[[], T],
+    encode: Callable[[T], str],
+    decode: Callable[[str], T],
+    ext: str = "txt",
+) -> T:
+    """
+    Run an upstream fetch according to FETCH_MODE: live calls `fetch`, record calls it
+    and saves the encoded response (unless it is None), replay serves the saved one.
+    """
+    current = mode()
+    if current == "replay":
+        return decode(load_text(kind, key, ext))
+    value = fetch()
+    if current == "record" and value is not None:
+        save_text(kind, key, encode(value), ext)
+    return value
+
+
+def save_frame(kind: str, key: str, frame) -> None:
+    """Record a DataFrame, merged with (and overriding) rows recorded earlier."""
+    import pandas as pd
+
+    frame = frame.copy()
+    if getattr(frame.index, "tz", None) is not None:
+        frame.index = frame.index.tz_localize(None)
+    try:
+        previous = load_frame(kind, key, latency=False)
+        frame = pd.concat([previous[~previous.index.isin(frame.index)], frame]).sort_index()
+    except FixtureMissing:
+        pass
+    save_text(kind, key, frame.to_csv(), "csv")
+
+
+def load_frame(kind: str, key: str, latency: bool = True):
+    import pandas as pd
+
+    if latency:
+        _inject_latency()
+    try:
+        with open(_path(kind, key, "csv"), encoding="utf-8") as f:
+            text = f.read()
+    except FileNotFoundError:
+        raise FixtureMissing(f"No recorded {kind} response for {key}")
+    return pd.read_csv(io.StringIO(text), index_col=0, parse_dates=True)
+
+
+def slice_frame(frame, period: Optional[str] = None, start: Optional[str] = None):
+    """Apply a yfinance-style period ('30d') or start date to a recorded frame."""
+    import pandas as pd
+
+    if start:
+        return frame[frame.index >= pd.Timestamp(start)]
+    if period and period.endswith("d") and len(frame):
+        return frame[frame.index > frame.index[-1] - pd.Timedelta(days=int(period[:-1]))]
+    return frame
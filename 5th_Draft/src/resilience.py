@@ -0,0 +1,184 @@
+# Circuit breakers and adaptive rate limiting for upstream data sources
+import threading
+import time
+from typing import Any, Callable, Dict, TypeVar
+
+from . import config
+
+T = TypeVar("T")
+
+
+class CircuitOpen(RuntimeError):
+    """The upstream's breaker is open; the call was not attempted."""
+
+
+class RateLimited(RuntimeError):
+    """No token was available for the upstream within the wait limit."""
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive failures; open -> half_open
+    after `reset_seconds`, letting a single probe through; the probe's outcome closes
+    or re-opens the breaker.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = "half_open"
+                self._probe_in_flight = False
+            if self.state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def cancel_probe(self) -> None:
+        """The allowed call was not made after all; let another one probe."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def is_open(self) -> bool:
+        with self._lock:
+            return self.state != "closed"
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"state": self.state, "failures": self.failures, "rejected": self.rejected}
+
+
+class TokenBucket:
+    """
+    Token bucket whose refill rate adapts AIMD-style: halved on upstream failures
+    (down to min_rate), raised by 10% of max_rate on successes (up to max_rate).
+    """
+
+    def __init__(self, max_rate: float, burst: float, min_rate: float | None = None):
+        self.max_rate = max_rate
+        self.min_rate = min_rate if min_rate is not None else max_rate / 8
+        self.rate = max_rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.allowed = 0
+        self.limited = 0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, timeout: float = 0.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    self.allowed += 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+                if now + wait > deadline:
+                    self.limited += 1
+                    return False
+            time.sleep(wait)
+
+    def penalize(self) -> None:
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+
+    def reward(self) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                "rate_per_sec": round(self.rate, 3),
+                "tokens": round(self.tokens, 2),
+                "allowed": self.allowed,
+                "limited": self.limited,
+            }
+
+
+class Upstream:
+    def __init__(self, name: str, breaker: CircuitBreaker, limiter: TokenBucket):
+        self.name = name
+        self.breaker = breaker
+        self.limiter = limiter
+
+    def call(self, fn: Callable[[], T]) -> T:
+        """Run one outbound call under this upstream's limiter and breaker."""
+        if not self.breaker.allow():
+            raise CircuitOpen(f"{self.name}: circuit open")
+        if not self.limiter.acquire(config.RATE_LIMIT_WAIT_SECS):
+            self.breaker.cancel_probe()
+            raise RateLimited(f"{self.name}: rate limit reached")
+        try:
+            result = fn()
+        except Exception:
+            self.breaker.record_failure()
+            self.limiter.penalize()
+            raise
+        self.breaker.record_success()
+        self.limiter.reward()
+        return result
+
+
+UPSTREAMS: Dict[str, Upstream] = {
+    "yahoo": Upstream(
+        "yahoo",
+        CircuitBreaker(config.BREAKER_FAILURES, config.BREAKER_RESET_SECS),
+        TokenBucket(config.YAHOO_RATE_PER_SEC, config.YAHOO_BURST),
+    ),
+    "google_news": Upstream(
+        "google_news",
+        CircuitBreaker(config.BREAKER_FAILURES, config.BREAKER_RESET_SECS),
+        TokenBucket(config.NEWS_RATE_PER_SEC, config.NEWS_BURST),
+    ),
+}
+
+
+def guarded(name: str, fn: Callable[[], T]) -> T:
+    return UPSTREAMS[name].call(fn)
+
+
+def is_failing(name: str) -> bool:
+    """True while the upstream's breaker is open or probing."""
+    return UPSTREAMS[name].breaker.is_open()
+
+
+def snapshot() -> Dict[str, Any]:
+    return {
+        name: {"breaker": u.breaker.snapshot(), "limiter": u.limiter.snapshot()}
+        for name, u in UPSTREAMS.items()
+    }
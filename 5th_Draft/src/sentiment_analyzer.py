@@ -1,20 +1,218 @@
 # NLP for news & tweets
-import nltk
-from nltk.sentiment import SentimentIntensityAnalyzer
+import hashlib
 import logging
+import math
+import os
+import re
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
-try:
-    nltk.download("vader_lexicon", quiet=True)
-except Exception as e:
-    logging.getLogger(__name__).warning("Failed to download vader_lexicon: %s", e)
+from . import config
+from .cache import TTLCache
 
-sia = SentimentIntensityAnalyzer()
+# Where nltk keeps the lexicon inside an NLTK_DATA directory
+VADER_RESOURCE = "sentiment/vader_lexicon.zip/vader_lexicon/vader_lexicon.txt"
 
-def analyze_sentiment(text: str) -> str:
-    score = sia.polarity_scores(text)
-    if score['compound'] > 0.05:
+# (label, compound) per headline hash; headlines repeat across cached news requests
+memo = TTLCache(ttl_seconds=config.SENTIMENT_MEMO_TTL_SECS, max_entries=config.SENTIMENT_MEMO_SIZE)
+
+
+def label_for(compound: float) -> str:
+    if compound > 0.05:
         return "Positive"
-    elif score['compound'] < -0.05:
+    elif compound < -0.05:
         return "Negative"
     else:
         return "Neutral"
+
+
+def headline_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class _Lazy:
+    """A resource built on first use behind a lock; a failed build is logged once and gives None."""
+
+    def __init__(self, name: str, build: Callable[[], Any]):
+        self.name = name
+        self.build = build
+        self.value = None
+        self.failed = False
+        self.lock = threading.Lock()
+
+    def get(self):
+        if self.value is None and not self.failed:
+            with self.lock:
+                if self.value is None and not self.failed:
+                    try:
+                        self.value = self.build()
+                    except Exception as e:
+                        self.failed = True
+                        logging.getLogger(__name__).warning("%s unavailable, sentiment is Neutral: %s", self.name, e)
+        return self.value
+
+
+def _load_analyzer():
+    """VADER from a local lexicon: VADER_LEXICON_PATH, else the NLTK_DATA search path. Never downloads."""
+    from nltk.sentiment import SentimentIntensityAnalyzer
+
+    if config.VADER_LEXICON_PATH:
+        return SentimentIntensityAnalyzer(lexicon_file="file:" + os.path.abspath(config.VADER_LEXICON_PATH))
+    return SentimentIntensityAnalyzer(lexicon_file=VADER_RESOURCE)
+
+
+_vader = _Lazy("VADER lexicon", _load_analyzer)
+
+
+def analyzer():
+    """The process-wide VADER analyzer, built on first use; None if the lexicon is not available."""
+    return _vader.get()
+
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+_END = ""  # trie key holding a phrase's score; never a token
+
+
+def _tokens(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+class FinanceLexicon:
+    """
+    Phrase lexicon compiled into a token trie. score() walks the headline once,
+    taking the longest phrase at each position ("cost cuts" over "cuts") and
+    flipping phrases within three tokens after a negator ("fails to beat").
+    """
+
+    NEGATORS = {"not", "no", "never", "without", "fails", "failed", "fail", "nor", "cannot"}
+    NEGATION_WINDOW = 3
+    NEGATION_SCALAR = -0.74  # as VADER
+    ALPHA = 15  # VADER's compound normalization constant
+
+    def __init__(self, entries: Dict[str, float]):
+        self.root: dict = {}
+        for phrase, score in entries.items():
+            node = self.root
+            for token in _tokens(phrase):
+                node = node.setdefault(token, {})
+            node[_END] = score
+
+    @classmethod
+    def load(cls, path: str) -> "FinanceLexicon":
+        entries: Dict[str, float] = {}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                phrase, score = line.split("\t")[:2]
+                entries[phrase] = float(score)
+        return cls(entries)
+
+    def score(self, text: str) -> float:
+        """Compound score in [-1, 1]."""
+        tokens = _tokens(text)
+        total = 0.0
+        negated_at = -self.NEGATION_WINDOW - 1
+        i = 0
+        while i < len(tokens):
+            token = tokens[i]
+            if token in self.NEGATORS or token.endswith("n't"):
+                negated_at = i
+                i += 1
+                continue
+            node, j, match, end = self.root, i, None, i + 1
+            while j < len(tokens) and tokens[j] in node:
+                node = node[tokens[j]]
+                j += 1
+                if _END in node:
+                    match, end = node[_END], j
+            if match is not None:
+                if i - negated_at <= self.NEGATION_WINDOW:
+                    match *= self.NEGATION_SCALAR
+                total += match
+            i = end
+        return total / math.sqrt(total * total + self.ALPHA) if total else 0.0
+
+
+_finance = _Lazy("Finance lexicon", lambda: FinanceLexicon.load(config.FINANCE_LEXICON_PATH))
+
+
+def finance_lexicon() -> Optional[FinanceLexicon]:
+    """The process-wide finance lexicon, compiled on first use; None if it cannot be read."""
+    return _finance.get()
+
+
+def _load_model():
+    from .sentiment_model import HashedLinearModel
+
+    return HashedLinearModel.load(config.SENTIMENT_MODEL_PATH)
+
+
+_model = _Lazy("Sentiment model", _load_model)
+
+
+def sentiment_model():
+    """The process-wide hashed linear model, loaded on first use; None if unavailable."""
+    return _model.get()
+
+
+Scores = List[Tuple[str, float]]
+
+
+def batch_scorer(engine: Optional[str] = None) -> Optional[Callable[[List[str]], Scores]]:
+    """
+    texts -> [(label, compound)] for an engine (default: SENTIMENT_ENGINE), or None if
+    its data is unavailable. Compound scores are in [-1, 1]; for the model it is
+    P(Positive) - P(Negative) and the label is the most likely class.
+    """
+    engine = engine or config.SENTIMENT_ENGINE
+    if engine == "sklearn":
+        model = sentiment_model()
+        return model.predict if model is not None else None
+    if engine == "finance":
+        lexicon = finance_lexicon()
+        score = lexicon.score if lexicon is not None else None
+    else:
+        sia = analyzer()
+        score = (lambda text: sia.polarity_scores(text)["compound"]) if sia is not None else None
+    if score is None:
+        return None
+    return lambda texts: [(label_for(c), c) for c in map(score, texts)]
+
+
+def preload() -> None:
+    """Build the configured engine now, e.g. in a gunicorn --preload master so forked workers share it."""
+    batch_scorer()
+
+
+def analyze_sentiment_batch(texts: Iterable[str], engine: Optional[str] = None) -> Optional[Scores]:
+    """
+    (label, compound score) for each text; memoized, memo misses scored in one batch.
+    None if the engine's data is unavailable, so callers can tell "no scorer" from Neutral.
+    """
+    engine = engine or config.SENTIMENT_ENGINE
+    texts = list(texts)
+    score_batch = batch_scorer(engine)
+    if score_batch is None:
+        return None
+    keys = [f"{engine}:{headline_hash(text)}" for text in texts]
+    found: Dict[str, Tuple[str, float]] = {}
+    missing: Dict[str, str] = {}
+    for key, text in zip(keys, texts):
+        if key not in found and key not in missing:
+            result = memo.get(key)
+            if result is None:
+                missing[key] = text
+            else:
+                found[key] = result
+    if missing:
+        for key, result in zip(missing, score_batch(list(missing.values()))):
+            memo.set(key, result)
+            found[key] = result
+    return [found[key] for key in keys]
+
+
+def analyze_sentiment(text: str) -> str:
+    scores = analyze_sentiment_batch([text])
+    return scores[0][0] if scores is not None else "Neutral"
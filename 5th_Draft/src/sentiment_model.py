@@ -0,0 +1,105 @@
+# Hashed-feature linear sentiment classifier (scikit-learn), trained offline
+# Train: python -m src.sentiment_model [labeled.tsv] [model.npz]   (run from 5th_Draft/)
+import os
+import sys
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+N_FEATURES = 2 ** 16
+NGRAM_RANGE = (1, 2)
+
+
+def _vectorizer(n_features: int, ngram_range: Tuple[int, int]):
+    from sklearn.feature_extraction.text import HashingVectorizer
+
+    # Stateless: the same parameters hash a headline to the same columns at train and inference time
+    return HashingVectorizer(
+        n_features=n_features,
+        ngram_range=ngram_range,
+        alternate_sign=False,
+        lowercase=True,
+        token_pattern=r"(?u)\b\w[\w']*\b",
+    )
+
+
+class HashedLinearModel:
+    """
+    Multinomial logistic regression over hashed word/bigram features. Inference for
+    a batch is one sparse (headlines x features) @ dense (features x classes) product.
+    """
+
+    def __init__(self, coef: np.ndarray, intercept: np.ndarray, classes: Sequence[str],
+                 n_features: int = N_FEATURES, ngram_range: Tuple[int, int] = NGRAM_RANGE):
+        self.coef_t = np.ascontiguousarray(coef.T, dtype="f4")  # features x classes
+        self.intercept = np.asarray(intercept, dtype="f4")
+        self.classes = [str(c) for c in classes]
+        self.vectorizer = _vectorizer(n_features, ngram_range)
+        self._pos = self.classes.index("Positive")
+        self._neg = self.classes.index("Negative")
+
+    @classmethod
+    def load(cls, path: str) -> "HashedLinearModel":
+        with np.load(path) as f:
+            return cls(
+                f["coef"], f["intercept"], f["classes"].tolist(),
+                int(f["n_features"]), tuple(int(n) for n in f["ngram_range"]),
+            )
+
+    def save(self, path: str) -> None:
+        np.savez_compressed(
+            path,
+            coef=self.coef_t.T,
+            intercept=self.intercept,
+            classes=np.array(self.classes),
+            n_features=self.vectorizer.n_features,
+            ngram_range=np.array(self.vectorizer.ngram_range),
+        )
+
+    def predict(self, texts: Sequence[str]) -> List[Tuple[str, float]]:
+        """(label, P(Positive) - P(Negative)) per text."""
+        if not texts:
+            return []
+        logits = self.vectorizer.transform(texts) @ self.coef_t + self.intercept
+        logits -= logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        probs /= probs.sum(axis=1, keepdims=True)
+        compound = probs[:, self._pos] - probs[:, self._neg]
+        return [(self.classes[i], float(c)) for i, c in zip(probs.argmax(axis=1), compound)]
+
+
+def read_labeled(path: str) -> Tuple[List[str], List[str]]:
+    """(labels, headlines) from a label<TAB>headline file with a header row."""
+    labels, headlines = [], []
+    with open(path, encoding="utf-8") as f:
+        next(f)
+        for line in f:
+            if line.strip():
+                label, headline = line.rstrip("\n").split("\t", 1)
+                labels.append(label)
+                headlines.append(headline)
+    return labels, headlines
+
+
+def train(labels: Sequence[str], headlines: Sequence[str]) -> HashedLinearModel:
+    from sklearn.linear_model import LogisticRegression
+
+    vectorizer = _vectorizer(N_FEATURES, NGRAM_RANGE)
+    clf = LogisticRegression(C=10.0, max_iter=2000)
+    clf.fit(vectorizer.transform(headlines), labels)
+    return HashedLinearModel(clf.coef_, clf.intercept_, clf.classes_.tolist())
+
+
+def main(argv: List[str]) -> None:
+    data = argv[1] if len(argv) > 1 else os.path.join(DATA_DIR, "sentiment_train.tsv")
+    out = argv[2] if len(argv) > 2 else os.path.join(DATA_DIR, "sentiment_model.npz")
+    labels, headlines = read_labeled(data)
+    model = train(labels, headlines)
+    model.save(out)
+    accuracy = np.mean([p == l for (p, _), l in zip(model.predict(headlines), labels)])
+    print(f"trained on {len(headlines)} headlines (train accuracy {accuracy:.1%}) -> {out} ({os.path.getsize(out) // 1024} KB)")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -1,9 +1,15 @@
 import sqlite3
+import math
 import os
-from typing import Optional, Tuple
+import time
+from typing import Iterable, Optional, Tuple
 
 DB_PATH = os.getenv("CHAT_DB_PATH", os.path.join(os.path.dirname(__file__), "fintalk.sqlite3"))
 
+# Time constants (seconds) of the per-ticker sentiment averages
+SENTIMENT_TAU_24H = 24 * 3600.0
+SENTIMENT_TAU_7D = 7 * 24 * 3600.0
+
 
 def init_db() -> None:
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
@@ -19,6 +25,35 @@ def init_db() -> None:
             )
             """
         )
+        # Scores of different engines are not comparable, so the index is kept per engine
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS headline_sentiment (
+                ticker TEXT NOT NULL,
+                engine TEXT NOT NULL,
+                headline_hash TEXT NOT NULL,
+                compound REAL NOT NULL,
+                scored_at REAL NOT NULL,
+                PRIMARY KEY (ticker, engine, headline_hash)
+            )
+            """
+        )
+        # Time-decayed sums per ticker: average = sum / weight, both decayed to updated_at
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ticker_sentiment (
+                ticker TEXT NOT NULL,
+                engine TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                sum_24h REAL NOT NULL,
+                weight_24h REAL NOT NULL,
+                sum_7d REAL NOT NULL,
+                weight_7d REAL NOT NULL,
+                headlines INTEGER NOT NULL,
+                PRIMARY KEY (ticker, engine)
+            )
+            """
+        )
 
 
 def log_chat(user_message: str, bot_reply: str, mode: Optional[str] = None) -> None:
@@ -38,4 +73,87 @@ def recent_chats(limit: int = 20) -> list[Tuple[int, str, str, Optional[str], st
         return list(cur.fetchall())
 
 
+def recent_user_messages(since_hours: float = 24, limit: int = 1000) -> list[str]:
+    with sqlite3.connect(DB_PATH) as conn:
+        cur = conn.execute(
+            "SELECT user_message FROM chats WHERE created_at >= datetime('now', ?) ORDER BY id DESC LIMIT ?",
+            (f"-{float(since_hours)} hours", limit),
+        )
+        return [row[0] for row in cur.fetchall()]
+
+
+def record_headline_sentiment(
+    ticker: str, engine: str, scored: Iterable[Tuple[str, float]], scored_at: Optional[float] = None
+) -> int:
+    """
+    Store one engine's (headline_hash, compound) scores for a ticker and fold headlines
+    not seen before into its 24h/7d time-decayed averages, O(1) per headline. Returns
+    the number of new headlines.
+    """
+    now = time.time() if scored_at is None else scored_at
+    with sqlite3.connect(DB_PATH) as conn:
+        new = [
+            compound for headline_hash, compound in scored
+            if conn.execute(
+                "INSERT OR IGNORE INTO headline_sentiment(ticker, engine, headline_hash, compound, scored_at) "
+                "VALUES (?,?,?,?,?)",
+                (ticker, engine, headline_hash, compound, now),
+            ).rowcount
+        ]
+        if not new:
+            return 0
+        row = conn.execute(
+            "SELECT updated_at, sum_24h, weight_24h, sum_7d, weight_7d, headlines FROM ticker_sentiment "
+            "WHERE ticker = ? AND engine = ?",
+            (ticker, engine),
+        ).fetchone()
+        updated_at, sum_24h, weight_24h, sum_7d, weight_7d, headlines = row or (now, 0.0, 0.0, 0.0, 0.0, 0)
+        # Decay the aggregate to `now`; a late, older batch is decayed itself instead
+        age = now - updated_at
+        decay_24h = math.exp(-abs(age) / SENTIMENT_TAU_24H)
+        decay_7d = math.exp(-abs(age) / SENTIMENT_TAU_7D)
+        if age >= 0:
+            sum_24h, weight_24h = sum_24h * decay_24h, weight_24h * decay_24h
+            sum_7d, weight_7d = sum_7d * decay_7d, weight_7d * decay_7d
+            updated_at, new_24h, new_7d = now, 1.0, 1.0
+        else:
+            new_24h, new_7d = decay_24h, decay_7d
+        for compound in new:
+            sum_24h += compound * new_24h
+            weight_24h += new_24h
+            sum_7d += compound * new_7d
+            weight_7d += new_7d
+        conn.execute(
+            "INSERT OR REPLACE INTO ticker_sentiment"
+            "(ticker, engine, updated_at, sum_24h, weight_24h, sum_7d, weight_7d, headlines) VALUES (?,?,?,?,?,?,?,?)",
+            (ticker, engine, updated_at, sum_24h, weight_24h, sum_7d, weight_7d, headlines + len(new)),
+        )
+        return len(new)
 
+
+def ticker_sentiment(ticker: str, engine: str, now: Optional[float] = None) -> Optional[dict]:
+    """
+    Rolling sentiment for a ticker under one engine: 24h and 7d time-decayed average
+    compound scores, and the decayed headline weight behind each (roughly "headlines
+    in the window").
+    """
+    with sqlite3.connect(DB_PATH) as conn:
+        row = conn.execute(
+            "SELECT updated_at, sum_24h, weight_24h, sum_7d, weight_7d, headlines FROM ticker_sentiment "
+            "WHERE ticker = ? AND engine = ?",
+            (ticker, engine),
+        ).fetchone()
+    if row is None:
+        return None
+    updated_at, sum_24h, weight_24h, sum_7d, weight_7d, headlines = row
+    age = max(0.0, (time.time() if now is None else now) - updated_at)
+    return {
+        "ticker": ticker,
+        "engine": engine,
+        "avg_24h": sum_24h / weight_24h if weight_24h else None,
+        "avg_7d": sum_7d / weight_7d if weight_7d else None,
+        "weight_24h": weight_24h * math.exp(-age / SENTIMENT_TAU_24H),
+        "weight_7d": weight_7d * math.exp(-age / SENTIMENT_TAU_7D),
+        "headlines": headlines,
+        "updated_at": updated_at,
+    }
@@ -0,0 +1,85 @@
+# Cheap, network-free checks for whether a token can be a ticker symbol
+import csv
+import logging
+import os
+import re
+from typing import Optional, Set
+
+from . import config
+
+# Words that match the 2-5 letter ticker pattern in ordinary chat messages
+COMMON_WORDS = {
+    "A", "ABOUT", "ALL", "ALSO", "AM", "AN", "AND", "ANY", "ARE", "AS", "AT", "BE", "BUT", "BUY", "BY",
+    "CAN", "CHART", "COULD", "DAY", "DAYS", "DID", "DO", "DOES", "EACH", "FOR", "FROM", "GET", "GIVE",
+    "GOOD", "HAS", "HAVE", "HELLO", "HELP", "HER", "HEY", "HI", "HIM", "HIS", "HOW", "I", "IF", "IN",
+    "INFO", "INTO", "IS", "IT", "ITS", "JUST", "LAST", "LIKE", "LIST", "LOOK", "ME", "MORE", "MUCH",
+    "MY", "NEW", "NEWS", "NO", "NOT", "NOW", "OF", "OK", "ON", "ONE", "OR", "OUR", "OUT", "PLEASE",
+    "PRICE", "QUOTE", "RATE", "SAY", "SELL", "SHE", "SHOW", "SO", "STOCK", "TELL", "THAN", "THANK",
+    "THANKS", "THAT", "THE", "THEM", "THEN", "THERE", "THEY", "THIS", "TO", "TODAY", "TOO", "TRADE",
+    "UP", "US", "VALUE", "VS", "WAS", "WE", "WEEK", "WELL", "WERE", "WHAT", "WHEN", "WHICH", "WHO",
+    "WHY", "WILL", "WITH", "WOULD", "YEAR", "YES", "YOU", "YOUR",
+}
+
+_SYMBOL_RE = re.compile(r"^[A-Z]{1,5}$")
+
+
+def looks_like_ticker(token: str, typed_in_caps: bool = False) -> bool:
+    """
+    Whether a word from a chat message may be a ticker. Common English words are
+    rejected unless the user typed them in capitals ('NOW price' means ServiceNow).
+    """
+    symbol = token.upper()
+    if symbol.endswith("-USD"):
+        return True
+    if not _SYMBOL_RE.match(symbol):
+        return False
+    return typed_in_caps or symbol not in COMMON_WORDS
+
+
+def _read_listing(path: str) -> Set[str]:
+    """
+    Load symbols from an exchange listing file: Nasdaq Trader pipe-delimited files
+    (nasdaqlisted.txt / otherlisted.txt), a CSV with a Symbol column, or one per line.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        first = f.readline()
+        f.seek(0)
+        delimiter = "|" if "|" in first else ("," if "," in first else None)
+        if delimiter is None:
+            return {line.strip().upper() for line in f if line.strip()}
+        reader = csv.DictReader(f, delimiter=delimiter)
+        column = next((c for c in (reader.fieldnames or []) if c.strip().lower() in {"symbol", "act symbol", "ticker"}), None)
+        if column is None:
+            return set()
+        symbols = set()
+        for row in reader:
+            value = (row.get(column) or "").strip().upper()
+            # Nasdaq Trader files end with a "File Creation Time" row
+            if value and not value.startswith("FILE CREATION TIME"):
+                symbols.add(value)
+        return symbols
+
+
+def _load_index() -> Optional[Set[str]]:
+    path = config.SYMBOL_LIST_PATH
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        return _read_listing(path)
+    except Exception as e:
+        logging.getLogger(__name__).warning("Failed to load symbol list %s: %s", path, e)
+        return None
+
+
+LISTED: Optional[Set[str]] = _load_index()
+
+
+def is_listed(symbol: str) -> bool:
+    """
+    False only when a listing file is loaded and a plain US-style symbol is not in it.
+    Crypto pairs, suffixed foreign listings and indices are outside the index.
+    """
+    symbol = symbol.upper()
+    if LISTED is None or symbol.endswith("-USD") or "." in symbol or "=" in symbol or symbol.startswith("^"):
+        return True
+    return symbol in LISTED